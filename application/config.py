@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -13,21 +14,76 @@ class Settings:
     CHROMADB_DIR = DATA_DIR / "chroma_db"
     PARSED_DOCS_DIR = DATA_DIR / "parsed_docs"
     KEYWORDS_FILE = DATA_DIR / "keywords" / "keyword_map.json"
+    CHUNK_STORE_FILE = DATA_DIR / "chunks.sqlite"
+    CHUNK_STORE_CACHE_SIZE = 256  # articles kept in the in-process LRU cache
+
+    # Versioned index snapshots
+    INDEX_SNAPSHOTS_DIR = DATA_DIR / "snapshots"
+    INDEX_SNAPSHOTS_KEEP = 3  # published versions kept for rollback
+    INDEX_WATCH_INTERVAL_SECONDS = 10  # poll for a newly published snapshot; 0 disables
+    INDEX_SEGMENTS_DIR = DATA_DIR / "segments"  # shared workspace of sharded builds
 
     # LocalAI
-    LOCALAI_URL = "http://localhost:8083"
+    LOCALAI_URL = os.getenv("LOCALAI_URL", "http://localhost:8083")
     LLM_MODEL = "mistral"
 
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+    # Vector index (HNSW). Space, M and construction ef are fixed when a collection is created;
+    # tune them and DISTANCE_THRESHOLD together with scripts/tune_hnsw.py.
+    HNSW_SPACE = "l2"  # l2 | cosine | ip
+    HNSW_M = 16
+    HNSW_CONSTRUCTION_EF = 100
+    HNSW_SEARCH_EF = 100  # Chroma's default; applied to existing collections when they are opened
+    SHARD_SEARCH_TIMEOUT_SECONDS = 2  # sharded snapshots: a slower shard is left out of the results
+    SHARD_SEARCH_WORKERS = 4  # concurrent searches per shard; a shard with all of them busy is skipped
+    DISTANCE_THRESHOLD = 0.8  # max distance of a relevant chunk, in HNSW_SPACE units
+
     LLM_MAX_CONTEXT_TOKENS = 2200  # input limit
     LLM_MAX_TOKENS = 512  # output limit
+    LLM_TIMEOUT_SECONDS = 300  # hard cap for a single upstream call
+    LLM_MAX_CONCURRENCY = 1  # LocalAI processes requests serially
+    LLM_MAX_QUEUE_DEPTH = 8  # waiting requests beyond this are shed
+    LLM_MIN_BUDGET_SECONDS = 15  # don't start an LLM call with less time left
+    LLM_COALESCE_REQUESTS = True  # identical in-flight requests share one upstream call
+
+    # Extractive prompt compression: drop the sentences least related to the question
+    PROMPT_COMPRESSION_ENABLED = False
+    PROMPT_COMPRESSION_TARGET_RATIO = 0.6  # share of context tokens to keep
+    PROMPT_COMPRESSION_MIN_TOKENS = 300  # smaller contexts are sent as-is
+
+    # Request handling
+    REQUEST_DEADLINE_SECONDS = 90
+
+    # Query log and precomputed answers for hot questions (scripts/precompute_answers.py)
+    QUERY_LOG_ENABLED = True
+    QUERY_LOG_FILE = DATA_DIR / "query_log.jsonl"
+    PRECOMPUTED_ANSWERS_ENABLED = True
+    PRECOMPUTED_ANSWERS_FILE = DATA_DIR / "precomputed_answers.json"
+    PRECOMPUTED_MATCH_DISTANCE = 0.1  # max cosine distance of a question to a hot cluster's centroid
+
+    # Conversation sessions
+    SESSION_MAX_SESSIONS = 1000
+    SESSION_TTL_SECONDS = 30 * 60
+    SESSION_DRIFT_THRESHOLD = 0.35  # cosine distance beyond which a follow-up re-retrieves
+    # Prompt budget for previous turns, as a share of the input limit: room for a full previous answer (LLM_MAX_TOKENS).
+    SESSION_HISTORY_MAX_TOKENS = LLM_MAX_CONTEXT_TOKENS * 2 // 5
 
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 50
 
+    # Near-duplicate chunk detection at ingestion (MinHash)
+    DEDUP_ENABLED = True
+    DEDUP_MIN_SIMILARITY = 0.85  # estimated Jaccard similarity of word shingles; near-identical text only
+    DEDUP_SHINGLE_SIZE = 3  # words per shingle
+    DEDUP_MIN_CHARS = 40  # shorter chunks are never collapsed
+    DEDUP_NUM_PERM = 128  # MinHash signature length
+    DEDUP_BANDS = 32  # LSH bands; num_perm / bands rows per band
+
     # API
     API_HOST = "0.0.0.0"
     API_PORT = 8084
+    ADMIN_TOKEN = os.getenv("DOCTHINK_ADMIN_TOKEN")  # admin endpoints are disabled when unset
     DEBUG = True
 
 
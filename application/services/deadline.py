@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.25  # seconds
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget is spent before the work is done."""
+
+
+class RequestCancelled(Exception):
+    """Raised when the caller of a request has gone away (e.g. client disconnect)."""
+
+
+class Deadline:
+    """
+    Time budget and cancellation flag for a single request.
+    Created at the API edge and passed down to retrieval and the LLM call,
+    which check it between units of work and cap their own timeouts with it.
+    Work that blocks without checking (e.g. a socket read) registers an
+    `on_cancel` callback to be interrupted instead.
+    """
+
+    def __init__(self, timeout: float | None = None):
+        self.expires_at = time.monotonic() + timeout if timeout else None
+        self._cancelled = threading.Event()
+        self._callbacks_lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+    def remaining(self) -> float | None:
+        """Seconds left, or None if the request has no deadline."""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._run_callbacks()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run `callback` when the deadline is cancelled, from the cancelling thread,
+        or right away if it already is. Returns a function that unregisters it.
+        """
+        with self._callbacks_lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._callbacks_lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def _run_callbacks(self) -> None:
+        with self._callbacks_lock:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error("Cancellation callback failed: %s", e)
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for a blocking call: the remaining budget, never more than `cap`."""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        return max(0.0, min(cap, remaining))
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise RequestCancelled("Request was cancelled by the caller.")
+        if self.expired():
+            raise DeadlineExceeded("Request deadline exceeded.")
+
+
+class DeadlineGroup(Deadline):
+    """
+    Deadline shared by several callers waiting on the same piece of work.
+    The work stays alive as long as any member still wants it: it expires
+    with the latest active member and is cancelled only once all members are,
+    which is also when its `on_cancel` callbacks run.
+    """
+
+    def __init__(self, members: list[Deadline]):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._members = list(members)
+        for member in members:
+            member.on_cancel(self._member_cancelled)
+
+    def add(self, member: Deadline) -> None:
+        with self._lock:
+            self._members.append(member)
+        member.on_cancel(self._member_cancelled)
+
+    def _member_cancelled(self) -> None:
+        if self.cancelled:
+            self._run_callbacks()
+
+    def _active(self) -> list[Deadline]:
+        with self._lock:
+            return [m for m in self._members if not m.cancelled]
+
+    def remaining(self) -> float | None:
+        active = self._active()
+        if not active:
+            return 0.0
+        remainders = [m.remaining() for m in active]
+        if any(r is None for r in remainders):
+            return None
+        return max(remainders)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or not self._active()
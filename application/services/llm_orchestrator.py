@@ -1,12 +1,31 @@
+import hashlib
+import json
 import logging
+import threading
 
 from application.config import settings
+from application.services.deadline import POLL_INTERVAL, Deadline, DeadlineExceeded, DeadlineGroup, RequestCancelled
+from application.services.metrics import metrics
 from core.models.llm import ChatMessage, LLMRequest
 from infrastructure.llm.abstract_llm import ILLMService
 
 logger = logging.getLogger(__name__)
 
 
+class LLMOverloadedError(Exception):
+    """Raised when the LLM queue is saturated and the request is shed."""
+
+
+class _Flight:
+    """An upstream LLM call shared by every caller that sent the same request."""
+
+    def __init__(self, deadline: DeadlineGroup):
+        self.deadline = deadline
+        self.done = threading.Event()
+        self.result: str | None = None
+        self.error: Exception | None = None
+
+
 class LLMOrchestrator:
     def __init__(self, llm_service: ILLMService):
         self.llm = llm_service
@@ -16,9 +35,18 @@ class LLMOrchestrator:
             "Do not make assumptions or generate information that is not present in the context. "
             "If the context does not contain the answer, say: \"I couldn't find the information in the available context.\""
         )
+
+        # Admission control: a bounded number of in-flight calls and a bounded wait queue.
+        self._slots = threading.BoundedSemaphore(settings.LLM_MAX_CONCURRENCY)
+        self._queue_lock = threading.Lock()
+        self._waiting = 0
+
+        # Single-flight: identical in-flight requests share one upstream call.
+        self._flights: dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
         logger.info("LLMOrchestrator initialized with LLM service: %s", type(self.llm).__name__)
 
-    def generate_answer(self, question: str, context: str) -> str:
+    def generate_answer(self, question: str, context: str, deadline: Deadline | None = None) -> str:
         messages = [
             ChatMessage(role="system", content=self.system_prompt),
             ChatMessage(role="user", content=self._build_prompt(question, context))
@@ -26,14 +54,114 @@ class LLMOrchestrator:
 
         request = LLMRequest(messages=messages, max_tokens=settings.LLM_MAX_TOKENS)
         logger.debug("Sending request to LLM: %s", request)
-        response = self.llm.chat_completion(request)
-        logger.debug("LLM response received.")
-        return response.text
+        return self.get_chat_completion(request, deadline)
 
-    def get_chat_completion(self, request: LLMRequest) -> str:
+    def get_chat_completion(self, request: LLMRequest, deadline: Deadline | None = None) -> str:
         logger.debug("get_chat_completion called. Max tokens: %s", request.max_tokens)
-        response = self.llm.chat_completion(request)
-        return response.text
+        deadline = deadline or Deadline()
+        if not settings.LLM_COALESCE_REQUESTS:
+            return self._complete(request, deadline)
+
+        key = self._request_key(request)
+        while True:
+            with self._flights_lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = _Flight(DeadlineGroup([deadline]))
+                    self._flights[key] = flight
+                    self._start_flight(key, flight, request)
+                else:
+                    flight.deadline.add(deadline)
+                    metrics.increment("llm_singleflight_followers_total")
+                    logger.info("Coalescing with an identical in-flight LLM request.")
+                self._update_coalescing_ratio()
+
+            result = self._wait(flight, deadline)
+            if result is not None:
+                return result
+            # The flight was abandoned by everyone before we joined; start a new one.
+
+    def _start_flight(self, key: str, flight: _Flight, request: LLMRequest) -> None:
+        """
+        Run the upstream call in its own thread, on the group deadline: it stays alive
+        while any caller still wants it, and no caller is tied to it beyond its own deadline.
+        """
+        metrics.increment("llm_singleflight_leaders_total")
+
+        def run():
+            try:
+                flight.result = self._complete(request, flight.deadline)
+            except Exception as e:
+                flight.error = e
+            finally:
+                with self._flights_lock:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+                flight.done.set()
+
+        threading.Thread(target=run, name="llm-flight", daemon=True).start()
+
+    @staticmethod
+    def _wait(flight: _Flight, deadline: Deadline) -> str | None:
+        """Wait for the shared call under the caller's own deadline. None means retry."""
+        while not flight.done.wait(timeout=deadline.timeout(POLL_INTERVAL)):
+            deadline.check()
+
+        if isinstance(flight.error, RequestCancelled) and not deadline.cancelled:
+            return None
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _complete(self, request: LLMRequest, deadline: Deadline) -> str:
+        self._acquire_slot(deadline)
+        try:
+            remaining = deadline.remaining()
+            if remaining is not None and remaining < settings.LLM_MIN_BUDGET_SECONDS:
+                metrics.increment("llm_shed_total", reason="deadline")
+                raise DeadlineExceeded(f"Only {remaining:.1f}s left, not enough for an LLM call.")
+
+            metrics.increment("llm_calls_total")
+            response = self.llm.chat_completion(request, deadline)
+            logger.debug("LLM response received.")
+            return response.text
+        finally:
+            self._slots.release()
+
+    def _acquire_slot(self, deadline: Deadline) -> None:
+        with self._queue_lock:
+            if self._waiting >= settings.LLM_MAX_QUEUE_DEPTH:
+                metrics.increment("llm_shed_total", reason="queue_full")
+                raise LLMOverloadedError(f"LLM queue is full ({self._waiting} waiting).")
+            self._waiting += 1
+            metrics.set_gauge("llm_queue_depth", self._waiting)
+
+        try:
+            while not self._slots.acquire(timeout=deadline.timeout(POLL_INTERVAL)):
+                try:
+                    deadline.check()
+                except DeadlineExceeded:
+                    metrics.increment("llm_shed_total", reason="queue_timeout")
+                    raise
+        finally:
+            with self._queue_lock:
+                self._waiting -= 1
+                metrics.set_gauge("llm_queue_depth", self._waiting)
+
+    def _update_coalescing_ratio(self) -> None:
+        leaders = metrics.get("llm_singleflight_leaders_total")
+        followers = metrics.get("llm_singleflight_followers_total")
+        metrics.set_gauge("llm_coalescing_ratio", followers / (leaders + followers))
+
+    @staticmethod
+    def _request_key(request: LLMRequest) -> str:
+        normalized = {
+            "messages": [[m.role, " ".join(m.content.split())] for m in request.messages],
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature,
+            "top_p": request.top_p,
+        }
+        return hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode("utf-8")).hexdigest()
 
     def _build_prompt(self, question: str, context: str) -> str:
         promt = (
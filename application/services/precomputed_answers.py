@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from application.config import settings
+from application.services.metrics import metrics
+from application.services.query_log import normalize_question
+from core.models.document import StoredChunk
+from core.models.precomputed import PrecomputedAnswer
+from infrastructure.db.index_registry import IndexHandle
+
+logger = logging.getLogger(__name__)
+
+
+def article_fingerprint(chunks: List[StoredChunk]) -> str:
+    """Content hash of an article as indexed; changes whenever a reindex changes the article."""
+    digest = hashlib.sha1()
+    for chunk in chunks:
+        digest.update(chunk.content.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class PrecomputedAnswers:
+    """
+    Answers to hot questions, generated offline by scripts/precompute_answers.py.
+
+    A question matches an entry of the same role set if its normalized text is
+    one of the entry's questions, or if its embedding is within `max_distance`
+    of the entry's centroid. An entry is only served while every source it
+    cited still has the fingerprint it had when the answer was generated, so a
+    reindex invalidates exactly the answers whose articles changed.
+    The file is reloaded when it changes on disk.
+    """
+
+    def __init__(
+            self,
+            path: Path = settings.PRECOMPUTED_ANSWERS_FILE,
+            max_distance: float = settings.PRECOMPUTED_MATCH_DISTANCE
+    ):
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        # (entries per role set, entry per (role set, normalized question), centroid matrix per role set),
+        # replaced as a whole on reload so lookups never see a mix of two files.
+        self._index: Tuple[Dict, Dict, Dict] = ({}, {}, {})
+        # Fingerprints of the served index, per (index version, source URL).
+        self._fingerprints: Dict[tuple, str] = {}
+
+    def lookup(self, handle: IndexHandle, question: str, roles: List[str]) -> PrecomputedAnswer | None:
+        self._reload_if_changed()
+        entries_by_roles, by_question, centroids = self._index
+        role_key = tuple(sorted(roles))
+        entries = entries_by_roles.get(role_key)
+        if not entries:
+            return None
+
+        entry = by_question.get((role_key, normalize_question(question)))
+        if entry is None:
+            embedding = np.asarray(handle.db.embed_texts([question])[0], dtype=np.float32)
+            embedding /= max(float(np.linalg.norm(embedding)), 1e-12)
+            distances = 1.0 - centroids[role_key] @ embedding
+            best = int(np.argmin(distances))
+            if distances[best] > self.max_distance:
+                metrics.increment("precomputed_answers_total", outcome="miss")
+                return None
+            entry = entries[best]
+
+        if not self._is_fresh(handle, entry):
+            logger.info(f"Precomputed answer for {entry.question!r} is stale, answering live.")
+            metrics.increment("precomputed_answers_total", outcome="stale")
+            return None
+
+        metrics.increment("precomputed_answers_total", outcome="hit")
+        return entry
+
+    def _is_fresh(self, handle: IndexHandle, entry: PrecomputedAnswer) -> bool:
+        for source_url, fingerprint in entry.fingerprints.items():
+            key = (handle.version, source_url)
+            current = self._fingerprints.get(key)
+            if current is None:
+                current = article_fingerprint(handle.db.get_article_chunks(source_url))
+                with self._lock:
+                    if len(self._fingerprints) > 10_000:
+                        self._fingerprints.clear()
+                    self._fingerprints[key] = current
+            if current != fingerprint:
+                return False
+        return True
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            entries = self.load(self.path) if mtime is not None else []
+            by_roles: Dict[tuple, List[PrecomputedAnswer]] = {}
+            for entry in entries:
+                by_roles.setdefault(tuple(entry.roles), []).append(entry)
+
+            centroids = {}
+            for role_key, role_entries in by_roles.items():
+                matrix = np.asarray([e.centroid for e in role_entries], dtype=np.float32)
+                centroids[role_key] = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+            by_question = {
+                (tuple(entry.roles), question): entry
+                for entry in entries for question in entry.questions
+            }
+            self._index = (by_roles, by_question, centroids)
+            self._mtime = mtime
+        logger.info("Loaded %d precomputed answer(s) from '%s'", len(entries), self.path)
+
+    @staticmethod
+    def load(path: Path) -> List[PrecomputedAnswer]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return [PrecomputedAnswer(**entry) for entry in json.load(f)]
+        except Exception as e:
+            logger.error("Failed to load precomputed answers from '%s': %s", path, e)
+            return []
+
+    @staticmethod
+    def save(path: Path, entries: List[PrecomputedAnswer]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so the API never reads a partial file.
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([entry.model_dump() for entry in entries], f, ensure_ascii=False)
+        os.replace(tmp_path, path)
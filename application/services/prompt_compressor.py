@@ -0,0 +1,108 @@
+import logging
+import math
+import re
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from application.config import settings
+from application.services.metrics import metrics
+from application.use_cases.utils import count_tokens
+from core.models.answer import CompressionStats
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+# Sentences carrying a link or a reference marker are never dropped.
+CITATION_PATTERN = re.compile(r"https?://|\[\d+\]")
+
+
+class PromptCompressor:
+    """
+    Extractive compression of the documentation sent to the LLM.
+
+    Sentences are scored by cosine similarity to the question over a single
+    batch of embeddings, and the least relevant ones are dropped until the
+    context fits `target_ratio` of its original token count. Kept sentences
+    stay in their original order and formatting; the first chunk (the article
+    title) and sentences with citations are always kept.
+    """
+
+    def __init__(
+            self,
+            target_ratio: float = settings.PROMPT_COMPRESSION_TARGET_RATIO,
+            min_tokens: int = settings.PROMPT_COMPRESSION_MIN_TOKENS,
+            model_name: str = settings.LLM_MODEL
+    ):
+        self.target_ratio = target_ratio
+        self.min_tokens = min_tokens
+        self.model_name = model_name
+
+    def compress(
+            self,
+            question: str,
+            chunks: List[str],
+            embed_texts: Callable[[List[str]], List[List[float]]]
+    ) -> Tuple[List[str], CompressionStats]:
+        started = time.perf_counter()
+        # (chunk index, sentence text including its trailing separator)
+        sentences: List[Tuple[int, str]] = []
+        for i, chunk in enumerate(chunks):
+            start = 0
+            for match in SENTENCE_BOUNDARY.finditer(chunk):
+                sentences.append((i, chunk[start:match.end()]))
+                start = match.end()
+            if start < len(chunk):
+                sentences.append((i, chunk[start:]))
+        sentences = [(i, s) for i, s in sentences if s.strip()]
+
+        tokens = [count_tokens(s, self.model_name) for _, s in sentences]
+        original_tokens = sum(tokens)
+        if original_tokens < self.min_tokens or len(sentences) < 2:
+            return chunks, self._stats(original_tokens, original_tokens, len(sentences), len(sentences), started)
+
+        protected = [i == 0 or bool(CITATION_PATTERN.search(s)) for i, s in sentences]
+        vectors = np.asarray(embed_texts([question] + [s.strip() for _, s in sentences]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        scores = vectors[1:] @ vectors[0]
+
+        budget = math.ceil(original_tokens * self.target_ratio)
+        keep = list(protected)
+        used = sum(t for t, p in zip(tokens, protected) if p)
+        for idx in np.argsort(-scores):
+            if keep[idx]:
+                continue
+            if used + tokens[idx] <= budget:
+                keep[idx] = True
+                used += tokens[idx]
+
+        kept_text = [""] * len(chunks)
+        for (i, sentence), kept in zip(sentences, keep):
+            if kept:
+                kept_text[i] += sentence
+        # Restore each chunk's trailing separator, which may have belonged to a dropped sentence.
+        compressed = [
+            text.rstrip() + chunk[len(chunk.rstrip()):]
+            for text, chunk in zip(kept_text, chunks) if text.strip()
+        ]
+
+        stats = self._stats(original_tokens, used, len(sentences), sum(keep), started)
+        metrics.increment("prompt_compression_tokens_total", original_tokens, stage="original")
+        metrics.increment("prompt_compression_tokens_total", used, stage="compressed")
+        logger.info(
+            f"Compressed context from {original_tokens} to {used} tokens "
+            f"({stats.sentences_kept}/{stats.sentences_total} sentences) in {stats.latency_ms:.0f} ms."
+        )
+        return compressed, stats
+
+    @staticmethod
+    def _stats(original: int, compressed: int, total: int, kept: int, started: float) -> CompressionStats:
+        return CompressionStats(
+            original_tokens=original,
+            compressed_tokens=compressed,
+            ratio=round(compressed / original, 4) if original else 1.0,
+            sentences_total=total,
+            sentences_kept=kept,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1)
+        )
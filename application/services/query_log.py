@@ -0,0 +1,70 @@
+import json
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from application.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation, so trivially different phrasings match."""
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+
+class QueryLog:
+    """
+    Append-only JSONL log of answered questions, one compact line per request:
+
+        {"ts": 1718000000, "q": "how to restrict a page", "roles": ["admin"],
+         "ms": 8123, "src": ["https://..."], "out": "complete", "cache": "miss"}
+
+    Answers are not logged. scripts/precompute_answers.py mines the log for hot questions.
+    """
+
+    def __init__(self, path: Path = settings.QUERY_LOG_FILE):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def record(
+            self,
+            question: str,
+            roles: List[str],
+            latency_ms: float,
+            sources: List[str],
+            outcome: str,
+            cache: str
+    ) -> None:
+        entry = {
+            "ts": int(time.time()),
+            "q": normalize_question(question),
+            "roles": sorted(roles),
+            "ms": int(latency_ms),
+            "src": sources,
+            "out": outcome,
+            "cache": cache,
+        }
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            # Logging must never fail a request.
+            logger.error("Failed to write query log '%s': %s", self.path, e)
+
+    def read(self, since: float = 0) -> Iterator[Dict]:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+                if entry.get("ts", 0) >= since:
+                    yield entry
@@ -0,0 +1,85 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from application.config import settings
+from core.models.session import ConversationSession
+
+logger = logging.getLogger(__name__)
+
+
+class SessionNotFoundError(Exception):
+    """Raised when a session id is unknown or its session has expired."""
+
+
+class SessionStore:
+    """
+    Bounded in-memory store of conversation sessions.
+    Sessions are kept in least-recently-used order and evicted when idle
+    for longer than `ttl_seconds` or when the store exceeds `max_sessions`.
+
+    `get` returns a copy. When two requests of the same session run
+    concurrently, `save` keeps the turns the other one saved in the meantime
+    and appends its own, so no turn is lost.
+    """
+
+    def __init__(
+            self,
+            max_sessions: int = settings.SESSION_MAX_SESSIONS,
+            ttl_seconds: int = settings.SESSION_TTL_SECONDS
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: OrderedDict[str, ConversationSession] = OrderedDict()
+        self._lock = threading.Lock()
+        logger.info("SessionStore initialized: max_sessions=%d, ttl=%ds", max_sessions, ttl_seconds)
+
+    def create(self) -> ConversationSession:
+        session = ConversationSession(session_id=uuid.uuid4().hex, updated_at=time.time())
+        self.save(session)
+        return session
+
+    def get(self, session_id: str) -> ConversationSession:
+        with self._lock:
+            self._evict_expired()
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFoundError(f"Session '{session_id}' not found or expired.")
+            self._sessions.move_to_end(session_id)
+            session = session.model_copy(deep=True)
+            session._turns_read = len(session.turns)
+            return session
+
+    def save(self, session: ConversationSession) -> None:
+        session.updated_at = time.time()
+        with self._lock:
+            stored = self._sessions.get(session.session_id)
+            if stored is not None and len(stored.turns) > session._turns_read:
+                session.turns = stored.turns + session.turns[session._turns_read:]
+            session._turns_read = len(session.turns)
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            self._evict_expired()
+            while len(self._sessions) > self.max_sessions:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                logger.debug("Evicted session %s (capacity).", evicted_id)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _evict_expired(self) -> None:
+        # Sessions are ordered by last access, so expired ones sit at the front.
+        cutoff = time.time() - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.updated_at >= cutoff:
+                break
+            del self._sessions[session_id]
+            logger.debug("Evicted session %s (ttl).", session_id)
@@ -1,24 +1,100 @@
 import logging
-from typing import List, Dict
+from collections import Counter
+from typing import Callable, List, Dict, Tuple
 from core.models.llm import ChatMessage, LLMRequest
 from application.config import settings
+from application.services.deadline import Deadline, DeadlineExceeded
+from application.services.llm_orchestrator import LLMOverloadedError
+from application.services.metrics import metrics
+from application.services.precomputed_answers import PrecomputedAnswers
+from application.services.prompt_compressor import PromptCompressor
+from application.services.session_store import SessionStore
+from core.models.answer import CompressionStats
+from core.models.session import ConversationSession, ConversationTurn
 from core.models.user_query import UserQuery
-from application.use_cases.utils import count_tokens
+from application.use_cases.utils import count_tokens, cosine_distance
+from infrastructure.db.index_registry import IndexHandle, IndexRegistry
+from infrastructure.db.vector_db import IVectorDatabase
+from infrastructure.llm.abstract_llm import LLMServiceError
 
 logger = logging.getLogger(__name__)
 
 
 class RAGUseCase:
-    def __init__(self, vector_db, llm_orchestrator):
-        self.db = vector_db
+    def __init__(
+            self,
+            index: IndexRegistry,
+            llm_orchestrator,
+            session_store: SessionStore | None = None,
+            prompt_compressor: PromptCompressor | None = None,
+            precomputed: PrecomputedAnswers | None = None
+    ):
+        self.index = index
         self.llm_orchestrator = llm_orchestrator
+        self.sessions = session_store
+        self.prompt_compressor = prompt_compressor
+        self.precomputed = precomputed
         self.max_context_tokens = settings.LLM_MAX_CONTEXT_TOKENS
         self.model_name = settings.LLM_MODEL
         logger.info("RAGUseCase initialized.")
 
-    def execute(self, query: UserQuery) -> Dict:
+    def execute(self, query: UserQuery, deadline: Deadline | None = None) -> Dict:
         logger.info(f"Executing RAG for query: {query.question!r}")
-        results = self.db.search(query.question, query.available_roles)
+        deadline = deadline or Deadline()
+        # One snapshot per request: a concurrent hot-swap never mixes two index versions,
+        # and the snapshot stays open until the request is done with it.
+        with self.index.use() as handle:
+            return self._execute(handle, query, deadline)
+
+    def _execute(self, handle: IndexHandle, query: UserQuery, deadline: Deadline) -> Dict:
+        if query.session_id is None or self.sessions is None:
+            # Follow-ups depend on the conversation, so only standalone questions use precomputed answers.
+            if self.precomputed is not None:
+                hit = self.precomputed.lookup(handle, query.question, query.available_roles)
+                if hit is not None:
+                    logger.info(f"Serving precomputed answer for {hit.question!r}.")
+                    return {"answer": hit.answer, "sources": hit.sources, "is_complete": True, "cache": "hit"}
+            return {**self._answer(handle.db, query, deadline), "cache": "miss"}
+
+        session = self.sessions.get(query.session_id)
+        if session.index_version != handle.version:
+            session.clear_context()
+            session.index_version = handle.version
+
+        # Short follow-ups ("and for admins?") carry little meaning on their own, so both
+        # the drift check and a re-retrieval use them together with the anchor question.
+        search_text = f"{session.anchor_question} {query.question}" if session.anchor_question else query.question
+        result = self._answer_follow_up(handle.db, query, search_text, session, deadline)
+        if result is None:
+            result = self._answer(handle.db, query, deadline, session, search_text)
+
+        turn = ConversationTurn(
+            question=query.question,
+            answer=result["answer"],
+            sources=result["sources"],
+            is_complete=result["is_complete"]
+        )
+        turn.tokens = count_tokens(self._format_turn(turn), self.model_name)
+        session.turns.append(turn)
+        self.sessions.save(session)
+
+        result["session_id"] = session.session_id
+        result["cache"] = "session"
+        return result
+
+    def _answer(
+            self,
+            db: IVectorDatabase,
+            query: UserQuery,
+            deadline: Deadline,
+            session: ConversationSession | None = None,
+            search_text: str | None = None
+    ) -> Dict:
+        search_text = search_text or query.question
+        results = db.search(search_text, query.available_roles, deadline=deadline)
+
+        if session is not None:
+            session.clear_context()
 
         if not results:
             logger.warning("No relevant chunks found.")
@@ -28,51 +104,191 @@ class RAGUseCase:
                 "is_complete": False
             }
 
-        # Group by source URL
+        # Group by source URL. A collapsed near-duplicate chunk (shared boilerplate) was
+        # indexed once for all the articles in its duplicate_sources: when its own article
+        # matched only through it, count it for one of those that also matched on their own.
+        matched = Counter(item.get("source_url") for item in results)
         articles_by_url: Dict[str, List[str]] = {}
         for item in results:
             url = item.get("source_url")
+            if matched[url] == 1:
+                url = next((u for u in item.get("duplicate_sources", []) if matched[u]), url)
             if url:
                 articles_by_url.setdefault(url, []).append(item.get("content", ""))
 
         if len(articles_by_url) == 1:
             logger.info("Single relevant article identified.")
             source_url = next(iter(articles_by_url))
-            chunks = self.db.get_chunks_by_source(source_url)
-            answer = self.reason_over_chunks(query.question, chunks)
-            return {
-                "answer": answer,
-                "sources": [source_url],
-                "is_complete": True
-            }
+            # One indexed read returns the article in order, with precomputed token counts.
+            article = db.get_article_chunks(source_url)
+            chunks = [chunk.content for chunk in article]
+            chunk_tokens = [chunk.token_count for chunk in article]
+
+            if session is not None:
+                session.roles = sorted(query.available_roles)
+                session.source_url = source_url
+                session.anchor_question = search_text
+                session.chunks = chunks
+                session.chunk_tokens = chunk_tokens
+                session.anchor_embedding = db.embed_texts([search_text])[0]
+
+            return self._answer_from_article(db, query.question, source_url, chunks, chunk_tokens, deadline, session)
 
         logger.info(f"Multiple articles found: {len(articles_by_url)} candidates.")
-        response_lines = ["Multiple relevant documents were found:\n"]
+        return self._retrieval_only_answer(articles_by_url, "Multiple relevant documents were found:\n")
+
+    def _answer_follow_up(
+            self,
+            db: IVectorDatabase,
+            query: UserQuery,
+            contextual_question: str,
+            session: ConversationSession,
+            deadline: Deadline
+    ) -> Dict | None:
+        """Answer from the session's retrieved context, or return None if it can't be reused."""
+        if not session.has_context() or session.roles != sorted(query.available_roles):
+            return None
+
+        embedding = db.embed_texts([contextual_question])[0]
+        distance = cosine_distance(embedding, session.anchor_embedding)
+        if distance > settings.SESSION_DRIFT_THRESHOLD:
+            logger.info(f"Follow-up drifted from session context (distance {distance:.2f}), re-retrieving.")
+            metrics.increment("session_turns_total", outcome="drift")
+            return None
+
+        logger.info(f"Reusing session context from {session.source_url} (distance {distance:.2f}).")
+        metrics.increment("session_turns_total", outcome="reuse")
+        return self._answer_from_article(
+            db, query.question, session.source_url, session.chunks, session.chunk_tokens, deadline, session
+        )
+
+    def _answer_from_article(
+            self,
+            db: IVectorDatabase,
+            question: str,
+            source_url: str,
+            chunks: List[str],
+            chunk_tokens: List[int],
+            deadline: Deadline,
+            session: ConversationSession | None = None
+    ) -> Dict:
+        history = self._build_history(session) if session is not None else []
+        try:
+            answer, compression = self.reason_over_chunks(
+                question, chunks, deadline, chunk_tokens, history, db.embed_texts
+            )
+        except (DeadlineExceeded, LLMOverloadedError, LLMServiceError) as e:
+            if isinstance(e, LLMServiceError):
+                reason, header = "llm_error", "The assistant is currently unavailable. The most relevant document is:\n"
+            else:
+                reason = "deadline" if isinstance(e, DeadlineExceeded) else "overloaded"
+                header = "The assistant could not generate an answer in time. The most relevant document is:\n"
+            logger.warning(f"Degrading to retrieval-only answer ({reason}): {e}")
+            metrics.increment("rag_degraded_total", reason=reason)
+            result = self._retrieval_only_answer(
+                {source_url: chunks[1:] or chunks},  # skip the title chunk for the snippet
+                header,
+                "Please try again later or follow the link for more details."
+            )
+            result["degraded"] = reason
+            return result
+        return {
+            "answer": answer,
+            "sources": [source_url],
+            "is_complete": True,
+            "compression": compression
+        }
+
+    def _retrieval_only_answer(
+            self,
+            articles_by_url: Dict[str, List[str]],
+            header: str,
+            footer: str = "Please clarify your question or follow the links for more details."
+    ) -> Dict:
+        response_lines = [header]
         urls = []
         for url, chunks in list(articles_by_url.items())[:5]:
             snippet = chunks[0][:500].strip().replace("\n", " ")
             response_lines.append(f"{url}:\n{snippet}\n")
             urls.append(url)
 
-        response_lines.append("Please clarify your question or follow the links for more details.")
+        response_lines.append(footer)
         return {
             "answer": "\n\n".join(response_lines),
             "sources": urls,
             "is_complete": False
         }
 
-    def reason_over_chunks(self, question: str, chunks: List[str]) -> str:
+    def _build_history(self, session: ConversationSession) -> List[ChatMessage]:
+        """
+        Replay the most recent turns that fit in SESSION_HISTORY_MAX_TOKENS.
+        Older turns are condensed to their questions, or dropped if even that doesn't fit.
+        Incomplete turns (retrieval-only or degraded answers) are only ever condensed:
+        replaying their text as an assistant turn would teach the model to repeat it.
+        """
+        budget = settings.SESSION_HISTORY_MAX_TOKENS
+        recent: List[ConversationTurn] = []
+        condensed: List[ConversationTurn] = []
+        cutoff = len(session.turns)
+        for i in range(len(session.turns) - 1, -1, -1):
+            turn = session.turns[i]
+            if turn.is_complete:
+                if turn.tokens > budget:
+                    break
+                recent.insert(0, turn)
+                budget -= turn.tokens
+            else:
+                condensed.insert(0, turn)
+            cutoff = i
+
+        older_questions: List[str] = []
+        for turn in reversed(session.turns[:cutoff] + condensed):
+            summary_tokens = count_tokens(turn.question, self.model_name) + 2
+            if summary_tokens > budget:
+                break
+            older_questions.insert(0, turn.question)
+            budget -= summary_tokens
+
+        messages: List[ChatMessage] = []
+        if older_questions:
+            summary = "Earlier in this conversation the user asked: " + "; ".join(older_questions)
+            messages.append(ChatMessage(role="user", content=summary))
+
+        for turn in recent:
+            messages.append(ChatMessage(role="user", content=turn.question))
+            messages.append(ChatMessage(role="assistant", content=turn.answer))
+        return messages
+
+    @staticmethod
+    def _format_turn(turn: ConversationTurn) -> str:
+        return f"{turn.question}\n{turn.answer}"
+
+    def _count_chunk_tokens(self, chunks: List[str]) -> List[int]:
+        return [count_tokens(chunk.strip() + "\n\n", self.model_name) for chunk in chunks]
+
+    def reason_over_chunks(
+            self,
+            question: str,
+            chunks: List[str],
+            deadline: Deadline | None = None,
+            chunk_tokens: List[int] | None = None,
+            history: List[ChatMessage] | None = None,
+            embed_texts: Callable[[List[str]], List[List[float]]] | None = None
+    ) -> Tuple[str, CompressionStats | None]:
         logger.info("Reasoning over selected chunks...")
+        history = history or []
+        chunk_tokens = chunk_tokens or self._count_chunk_tokens(chunks)
+
         system_tokens = count_tokens(self.llm_orchestrator.system_prompt, self.model_name)
         question_tokens = count_tokens(question, self.model_name)
-        base_tokens = system_tokens + question_tokens + 100  # safety buffer
+        history_tokens = sum(count_tokens(m.content, self.model_name) for m in history)
+        base_tokens = system_tokens + question_tokens + history_tokens + 100  # safety buffer
 
         total_tokens = base_tokens
         selected_chunks: List[str] = []
 
-        for chunk in chunks:
+        for chunk, chunk_token_count in zip(chunks, chunk_tokens):
             chunk_text = chunk.strip() + "\n\n"
-            chunk_token_count = count_tokens(chunk_text, self.model_name)
 
             if total_tokens + chunk_token_count > self.max_context_tokens:
                 logger.debug(f"Context limit reached at {total_tokens + chunk_token_count} tokens.")
@@ -81,13 +297,20 @@ class RAGUseCase:
             selected_chunks.append(chunk_text)
             total_tokens += chunk_token_count
 
-        logger.info(f"Using {len(selected_chunks)} chunks ({total_tokens} tokens total).")
+        logger.info(f"Using {len(selected_chunks)} chunks and {len(history)} history messages ({total_tokens} tokens total).")
+
+        compression = None
+        if self.prompt_compressor is not None and embed_texts is not None:
+            selected_chunks, compression = self.prompt_compressor.compress(question, selected_chunks, embed_texts)
+            if deadline is not None:
+                deadline.check()
 
         full_context = "".join(selected_chunks)
         logger.debug(f"Combined context:\n{full_context[:1000]}...")  # first 1000 chars
 
         messages = [
             ChatMessage(role="system", content=self.llm_orchestrator.system_prompt),
+            *history,
             ChatMessage(
                 role="user",
                 content=(
@@ -109,6 +332,6 @@ class RAGUseCase:
         )
 
         logger.info("Sending request to LLM...")
-        response = self.llm_orchestrator.get_chat_completion(request)
+        response = self.llm_orchestrator.get_chat_completion(request, deadline)
         logger.info("Received response from LLM.")
-        return response
+        return response, compression
@@ -1,3 +1,4 @@
+import numpy as np
 import tiktoken
 
 
@@ -7,3 +8,12 @@ def count_tokens(text: str, model: str) -> int:
     except KeyError:
         encoding = tiktoken.get_encoding("cl100k_base")
     return len(encoding.encode(text))
+
+
+def cosine_distance(a: list[float], b: list[float]) -> float:
+    a_vec = np.asarray(a, dtype=np.float32)
+    b_vec = np.asarray(b, dtype=np.float32)
+    norm = float(np.linalg.norm(a_vec) * np.linalg.norm(b_vec))
+    if norm == 0.0:
+        return 1.0
+    return 1.0 - float(np.dot(a_vec, b_vec)) / norm
@@ -1,7 +1,18 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+
+class CompressionStats(BaseModel):
+    original_tokens: int
+    compressed_tokens: int
+    ratio: float
+    sentences_total: int
+    sentences_kept: int
+    latency_ms: float
+
 
 class AnswerResponse(BaseModel):
     answer: str
     sources: List[str]
-    is_complete: bool
\ No newline at end of file
+    is_complete: bool
+    session_id: Optional[str] = None
+    compression: Optional[CompressionStats] = None
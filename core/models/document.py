@@ -14,3 +14,10 @@ class DocumentChunk(BaseModel):
     content: str
     section_title: str
     metadata: Dict[str, str]
+
+
+class StoredChunk(BaseModel):
+    content: str
+    section_title: str
+    order: int
+    token_count: int
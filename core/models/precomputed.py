@@ -0,0 +1,16 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class PrecomputedAnswer(BaseModel):
+    roles: List[str]  # sorted role set the answer was generated for
+    question: str  # most frequent question of the cluster, as asked
+    questions: List[str]  # normalized questions of the cluster
+    centroid: List[float]  # mean question embedding
+    answer: str
+    sources: List[str]
+    fingerprints: Dict[str, str]  # source URL -> article fingerprint at generation time
+    hits: int  # logged requests in the cluster
+    index_version: Optional[str] = None
+    created_at: str
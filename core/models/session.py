@@ -0,0 +1,44 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, PrivateAttr
+
+
+class ConversationTurn(BaseModel):
+    question: str
+    answer: str
+    sources: List[str]
+    is_complete: bool
+    tokens: int = 0  # prompt tokens of this turn when replayed as history
+
+
+class ConversationSession(BaseModel):
+    session_id: str
+    turns: List[ConversationTurn] = []
+    updated_at: float = 0.0
+
+    # Retrieved context reused by follow-up turns
+    index_version: Optional[str] = None
+    roles: List[str] = []
+    source_url: Optional[str] = None
+    anchor_question: Optional[str] = None  # search text that retrieved the context
+    chunks: List[str] = []
+    chunk_tokens: List[int] = []
+    anchor_embedding: List[float] = []
+
+    # Number of turns when this copy was read from the store, to merge concurrent turns on save.
+    _turns_read: int = PrivateAttr(default=0)
+
+    def has_context(self) -> bool:
+        return self.source_url is not None and bool(self.chunks)
+
+    def clear_context(self) -> None:
+        self.source_url = None
+        self.anchor_question = None
+        self.chunks = []
+        self.chunk_tokens = []
+        self.anchor_embedding = []
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    ttl_seconds: int
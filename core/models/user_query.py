@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -6,3 +6,4 @@ from pydantic import BaseModel
 class UserQuery(BaseModel):
     question: str
     available_roles: List[str]
+    session_id: Optional[str] = None
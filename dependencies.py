@@ -1,15 +1,21 @@
 import logging
 
 from application.services.llm_orchestrator import LLMOrchestrator
+from application.services.precomputed_answers import PrecomputedAnswers
+from application.services.prompt_compressor import PromptCompressor
+from application.services.query_log import QueryLog
+from application.services.session_store import SessionStore
 from application.use_cases.rag import RAGUseCase
 from application.config import settings
-from infrastructure.db.chroma_db import ChromaDB
+from infrastructure.db.index_registry import IndexRegistry
+from infrastructure.db.snapshots import SnapshotManager
 from infrastructure.llm.localai_mistral import LocalAIMistral
 
 logger = logging.getLogger(__name__)
 
-logger.info("Initializing vector DB")
-vector_db_instance = ChromaDB()
+logger.info("Initializing index registry")
+index_registry_instance = IndexRegistry(SnapshotManager())
+index_registry_instance.start_watching()
 
 logger.info("Initializing LLM instance")
 llm_instance = LocalAIMistral(
@@ -17,12 +23,30 @@ llm_instance = LocalAIMistral(
     model=settings.LLM_MODEL
 )
 
+logger.info("Initializing session store")
+session_store_instance = SessionStore()
+
+logger.info("Initializing query log")
+query_log_instance = QueryLog() if settings.QUERY_LOG_ENABLED else None
+
 logger.info("Initializing RAG use case")
-rag_use_case_instance = RAGUseCase(vector_db_instance, LLMOrchestrator(llm_instance))
+prompt_compressor_instance = PromptCompressor() if settings.PROMPT_COMPRESSION_ENABLED else None
+precomputed_answers_instance = PrecomputedAnswers() if settings.PRECOMPUTED_ANSWERS_ENABLED else None
+rag_use_case_instance = RAGUseCase(
+    index_registry_instance,
+    LLMOrchestrator(llm_instance),
+    session_store_instance,
+    prompt_compressor_instance,
+    precomputed_answers_instance
+)
 
 
 def get_vector_db():
-    return vector_db_instance
+    return index_registry_instance.current().db
+
+
+def get_index_registry():
+    return index_registry_instance
 
 
 def get_llm_service():
@@ -33,4 +57,12 @@ def get_rag_use_case():
     return rag_use_case_instance
 
 
+def get_session_store():
+    return session_store_instance
+
+
+def get_query_log():
+    return query_log_instance
+
+
 logger.info("All core services initialized")
@@ -1,35 +1,101 @@
+import hashlib
+import json
 import logging
 import re
-import uuid
 from typing import List, Dict
 from pathlib import Path
 
-from chromadb import PersistentClient, QueryResult
+from chromadb import Collection, PersistentClient, QueryResult
+from keybert import KeyBERT
 from sentence_transformers import SentenceTransformer
 
 from application.config import settings
-from core.models.document import Document, DocumentChunk
+from application.services.deadline import Deadline
+from application.use_cases.utils import count_tokens
+from core.models.document import Document, DocumentChunk, StoredChunk
+from infrastructure.db.chunk_store import ChunkStore
 from infrastructure.db.keyword_indexer import KeywordIndexer
+from infrastructure.db.near_duplicates import NearDuplicateDetector
 from infrastructure.db.vector_db import IVectorDatabase
 
 logger = logging.getLogger(__name__)
 
+COLLECTION_NAME = "knowledgebase"
+
+
+def hnsw_metadata(
+        space: str = settings.HNSW_SPACE,
+        m: int = settings.HNSW_M,
+        construction_ef: int = settings.HNSW_CONSTRUCTION_EF,
+        search_ef: int = settings.HNSW_SEARCH_EF
+) -> Dict[str, str | int]:
+    return {
+        "hnsw:space": space,
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+
+
+def add_duplicate_sources(collection: Collection, duplicate_sources: Dict[str, set]) -> None:
+    """Record the extra source references of collapsed chunks on their canonical chunk."""
+    ids = list(duplicate_sources)
+    existing = collection.get(ids=ids, include=["metadatas"])
+
+    metadatas = []
+    for chunk_id, meta in zip(existing["ids"], existing["metadatas"]):
+        sources = set(json.loads(meta.get("duplicate_sources", "[]")))
+        sources.update(duplicate_sources[chunk_id])
+        sources.discard(meta.get("source"))
+        metadatas.append({**meta, "duplicate_sources": json.dumps(sorted(sources))})
+
+    collection.update(ids=existing["ids"], metadatas=metadatas)
+    logger.debug("Recorded duplicate sources on %d canonical chunk(s).", len(ids))
+
 
 class ChromaDB(IVectorDatabase):
-    def __init__(self):
-        persist_path = str(settings.CHROMADB_DIR.absolute())
+    def __init__(
+            self,
+            persist_dir: Path | None = None,
+            keywords_file: Path | None = None,
+            chunk_store_file: Path | None = None,
+            embedding_model: SentenceTransformer | None = None,
+            keyword_model: KeyBERT | None = None,
+            hnsw: Dict[str, str | int] | None = None,
+            distance_threshold: float = settings.DISTANCE_THRESHOLD,
+            read_only: bool = False
+    ):
+        persist_path = str((persist_dir or settings.CHROMADB_DIR).absolute())
         Path(persist_path).mkdir(parents=True, exist_ok=True)
 
+        self.persist_dir = persist_path
         self.client = PersistentClient(path=persist_path)
-        self.collection = self.client.get_or_create_collection('knowledgebase')
-        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
-
-        self.keyword_indexer = KeywordIndexer(cache_path=settings.KEYWORDS_FILE)
-
-        logger.info("ChromaDB initialized. Collection loaded with embedding model '%s'", settings.EMBEDDING_MODEL)
+        self.hnsw = hnsw or hnsw_metadata()
+        self.collection = self.client.get_or_create_collection(COLLECTION_NAME, metadata=self.hnsw)
+        self._warn_on_hnsw_mismatch()
+        self._apply_search_ef()
+        self.distance_threshold = distance_threshold
+        # Models can be shared between instances, e.g. when hot-swapping index snapshots.
+        self.embedding_model = embedding_model or SentenceTransformer(settings.EMBEDDING_MODEL)
+
+        self.keyword_indexer = KeywordIndexer(cache_path=keywords_file or settings.KEYWORDS_FILE, model=keyword_model)
+        self.deduplicator = NearDuplicateDetector() if settings.DEDUP_ENABLED else None
+        chunk_store_file = chunk_store_file or settings.CHUNK_STORE_FILE
+        if not read_only:
+            self.chunk_store = ChunkStore(chunk_store_file)
+        elif chunk_store_file.exists():
+            self.chunk_store = ChunkStore(chunk_store_file, read_only=True)
+        else:
+            # Served indexes built before the chunk store existed fall back to collection scans.
+            logger.info("No chunk store at '%s', reading articles from the collection.", chunk_store_file)
+            self.chunk_store = None
+
+        logger.info("ChromaDB initialized at '%s' with embedding model '%s'", persist_path, settings.EMBEDDING_MODEL)
 
     def add_documents(self, documents: List[Document]) -> None:
         logger.info("Adding %d documents to ChromaDB...", len(documents))
+        duplicate_sources: Dict[str, set] = {}
+
         for document in documents:
             chunks = self._spit_into_paragraphs(document)
 
@@ -40,11 +106,34 @@ class ChromaDB(IVectorDatabase):
             )
             chunks.insert(0, title_chunk)
 
-            texts = [chunk.content for chunk in chunks]
+            # The chunk store keeps the full article, including chunks collapsed below.
+            self.chunk_store.add_article(document.source_url, [
+                StoredChunk(
+                    content=chunk.content,
+                    section_title=chunk.section_title,
+                    order=i,
+                    token_count=count_tokens(chunk.content.strip() + "\n\n", settings.LLM_MODEL)
+                ) for i, chunk in enumerate(chunks)
+            ])
+
+            # Collapse near-duplicates (boilerplate, templates) into the chunk already indexed.
+            # The title chunk is always kept so every article stays addressable.
+            kept = []
+            for i, chunk in enumerate(chunks):
+                canonical_id = self.deduplicator.find_duplicate(chunk.content, document.role) \
+                    if self.deduplicator and i > 0 else None
+                if canonical_id:
+                    logger.debug("Chunk %d of '%s' duplicates %s", i, document.source_url, canonical_id)
+                    duplicate_sources.setdefault(canonical_id, set()).add(document.source_url)
+                else:
+                    kept.append((i, chunk))
+
+            texts = [chunk.content for _, chunk in kept]
             embeddings = self.embedding_model.encode(texts)
-            chunk_ids = [f"doc_{i}_{uuid.uuid4()}" for i in range(len(chunks))]
+            chunk_ids = [self.chunk_id(document.source_url, i) for i, _ in kept]
 
-            self.collection.add(
+            # Deterministic ids + upsert make re-indexing a document idempotent (e.g. a resumed shard).
+            self.collection.upsert(
                 documents=texts,
                 embeddings=embeddings.tolist(),
                 metadatas=[{
@@ -52,21 +141,40 @@ class ChromaDB(IVectorDatabase):
                     "source": document.source_url,
                     "section": chunk.section_title,
                     "order": i
-                } for i, chunk in enumerate(chunks)],
+                } for i, chunk in kept],
                 ids=chunk_ids,
             )
 
-            for chunk, chunk_id in zip(chunks, chunk_ids):
+            for (_, chunk), chunk_id in zip(kept, chunk_ids):
                 logger.debug("Indexing chunk %s (section: %s)", chunk_id, chunk.section_title)
                 self.keyword_indexer.index_keywords(chunk, chunk_id)
+                if self.deduplicator:
+                    self.deduplicator.add(chunk_id, chunk.content, document.role)
+
+        if duplicate_sources:
+            add_duplicate_sources(self.collection, duplicate_sources)
 
         self.keyword_indexer.save_cache()
         logger.info("Keyword indexing completed and cache saved.")
 
-    def search(self, query: str, filter_roles: List[str], top_k: int = 3) -> List[Dict]:
+    @staticmethod
+    def chunk_id(source_url: str, order: int) -> str:
+        return f"doc_{hashlib.sha1(source_url.encode('utf-8')).hexdigest()[:16]}_{order}"
+
+    def dedup_stats(self) -> Dict[str, float]:
+        return self.deduplicator.stats() if self.deduplicator else {}
+
+    def search(
+            self,
+            query: str,
+            filter_roles: List[str],
+            top_k: int = 3,
+            deadline: Deadline | None = None
+    ) -> List[Dict]:
         logger.info("Searching for query: '%s'", query)
+        deadline = deadline or Deadline()
         keywords = self.keyword_indexer.search(query)
-        candidate_ids = set()
+        deadline.check()
 
         logger.debug("Extracted keywords: %s", keywords)
         logger.debug("Keyword map keys: %s", list(self.keyword_indexer.keyword_map.keys())[:20])
@@ -77,27 +185,45 @@ class ChromaDB(IVectorDatabase):
             else:
                 logger.debug("Keyword not found in index: '%s'", kw)
 
-        for kw in keywords:
-            candidate_ids.update(self.keyword_indexer.keyword_map.get(kw, []))
+        candidate_ids = self.candidate_ids(keywords)
 
         strict_mode = False
         if not candidate_ids:
             logger.info("No keyword match found. Fallback to strict vector filtering.")
             strict_mode = True
 
+        return self.search_by_embedding(
+            self.embedding_model.encode(query).tolist(),
+            filter_roles,
+            top_k,
+            keywords,
+            candidate_ids if candidate_ids else None,
+            strict_mode
+        )
+
+    def candidate_ids(self, keywords: List[str]) -> set:
+        candidate_ids = set()
+        for kw in keywords:
+            candidate_ids.update(self.keyword_indexer.keyword_map.get(kw, []))
+        return candidate_ids
+
+    def search_by_embedding(
+            self,
+            embedding: List[float],
+            filter_roles: List[str],
+            top_k: int,
+            keywords: List[str],
+            candidate_ids: set | None,
+            strict_mode: bool = False
+    ) -> List[Dict]:
+        """Vector stage of `search`, for callers that extracted keywords and embedded the query already."""
         results = self.collection.query(
-            query_embeddings=[self.embedding_model.encode(query).tolist()],
+            query_embeddings=[embedding],
             n_results=top_k * 5,
             where={"role": {"$in": filter_roles}},
         )
 
-        return self._post_filter_results(
-            results,
-            candidate_ids if candidate_ids else None,
-            top_k,
-            keywords,
-            strict_mode
-        )
+        return self._post_filter_results(results, candidate_ids, top_k, keywords, strict_mode)
 
     def _post_filter_results(
             self,
@@ -114,10 +240,9 @@ class ChromaDB(IVectorDatabase):
 
         filtered_results = []
         seen_docs = set()
-        DISTANCE_THRESHOLD = 0.8
 
         for doc, dist, doc_id, meta in zip(documents, distances, ids, metadatas):
-            if dist > DISTANCE_THRESHOLD:
+            if dist > self.distance_threshold:
                 continue
             if candidate_ids and doc_id not in candidate_ids:
                 continue
@@ -135,23 +260,76 @@ class ChromaDB(IVectorDatabase):
                     "distance": dist,
                     "source_url": meta.get("source", "unknown"),
                     "section": meta.get("section", "unknown"),
-                    "role": meta.get("role", "unknown")
+                    "role": meta.get("role", "unknown"),
+                    "duplicate_sources": json.loads(meta.get("duplicate_sources", "[]"))
                 })
 
         logger.info("Returning %d filtered result(s).", len(filtered_results[:top_k]))
         return filtered_results[:top_k]
 
     def get_chunks_by_source(self, source_url: str) -> List[str]:
+        return [chunk.content for chunk in self.get_article_chunks(source_url)]
+
+    def get_article_chunks(self, source_url: str) -> List[StoredChunk]:
+        chunks = self.chunk_store.get_article(source_url) if self.chunk_store else []
+        if chunks:
+            return chunks
+
+        # Indexes built before the chunk store existed: scan the collection instead.
+        logger.debug("Article '%s' not in chunk store, falling back to a collection scan.", source_url)
         result = self.collection.get(where={"source": source_url})
-        chunks = list(zip(result["documents"], result["metadatas"]))
-        chunks.sort(key=lambda x: x[1].get("order", 0))
-        return [doc for doc, _ in chunks]
+        rows = sorted(zip(result["documents"], result["metadatas"]), key=lambda x: x[1].get("order", 0))
+        return [
+            StoredChunk(
+                content=doc,
+                section_title=meta.get("section", "unknown"),
+                order=meta.get("order", 0),
+                token_count=count_tokens(doc.strip() + "\n\n", settings.LLM_MODEL)
+            ) for doc, meta in rows
+        ]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding_model.encode(texts).tolist()
+
+    def close(self) -> None:
+        if self.chunk_store:
+            self.chunk_store.close()
+        # Chroma keeps one System (sqlite connection, HNSW segments) per persist
+        # directory for the life of the process, until its last client is closed.
+        self.client.close()
+        logger.info("ChromaDB at '%s' closed.", self.persist_dir)
 
     def clear_collection(self) -> None:
         logger.warning("Clearing vector collection and keyword index...")
         self.client.delete_collection(self.collection.name)
-        self.collection = self.client.get_or_create_collection(self.collection.name)
+        self.collection = self.client.get_or_create_collection(self.collection.name, metadata=self.hnsw)
         self.keyword_indexer.keyword_map.clear()
+        self.chunk_store.clear()
+
+    def _warn_on_hnsw_mismatch(self) -> None:
+        # Index parameters of an existing collection can't change; only a rebuild applies new ones.
+        existing = self.collection.metadata or {}
+        for key, value in self.hnsw.items():
+            if key == "hnsw:search_ef":
+                continue  # a query-time parameter, see _apply_search_ef
+            if key in existing and existing[key] != value:
+                logger.warning(
+                    "Collection was built with %s=%s but settings specify %s; rebuild the index to apply it.",
+                    key, existing[key], value
+                )
+
+    def _apply_search_ef(self) -> None:
+        # ef_search only affects queries, so unlike the build parameters it can be
+        # changed on an existing collection without a rebuild.
+        search_ef = self.hnsw.get("hnsw:search_ef")
+        current = (self.collection.configuration_json.get("hnsw") or {}).get("ef_search")
+        if search_ef is None or current == search_ef:
+            return
+        try:
+            self.collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+            logger.info("Set HNSW ef_search %s -> %s on '%s'", current, search_ef, self.persist_dir)
+        except Exception as e:
+            logger.warning("Failed to set HNSW ef_search=%s on '%s': %s", search_ef, self.persist_dir, e)
 
     def _spit_into_paragraphs(self, doc: Document) -> List[DocumentChunk]:
         raw_paragraphs = re.split(r'\n\n+', doc.content)
@@ -0,0 +1,114 @@
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List
+
+from application.config import settings
+from application.services.metrics import metrics
+from core.models.document import StoredChunk
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkStore:
+    """
+    SQLite store of article chunks kept alongside the vectors.
+
+    Rows are clustered by (source, order), so fetching an article is a single
+    indexed range read that already comes back in reading order. Hot articles
+    are additionally served from an in-process LRU cache.
+
+    With `read_only`, an existing file is opened without write access and is
+    never created, e.g. when serving an immutable snapshot.
+    """
+
+    def __init__(
+            self,
+            db_path: Path = settings.CHUNK_STORE_FILE,
+            cache_size: int = settings.CHUNK_STORE_CACHE_SIZE,
+            read_only: bool = False
+    ):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, List[StoredChunk]] = OrderedDict()
+
+        if read_only:
+            self._conn = sqlite3.connect(f"{db_path.absolute().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            logger.info("ChunkStore opened read-only at '%s'", db_path)
+            return
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " source TEXT NOT NULL,"
+                " ord INTEGER NOT NULL,"
+                " section TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " token_count INTEGER NOT NULL,"
+                " PRIMARY KEY (source, ord)"
+                ") WITHOUT ROWID"
+            )
+        logger.info("ChunkStore opened at '%s'", db_path)
+
+    def add_article(self, source_url: str, chunks: List[StoredChunk]) -> None:
+        rows = [(source_url, c.order, c.section_title, c.content, c.token_count) for c in chunks]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE source = ?", (source_url,))
+            self._conn.executemany(
+                "INSERT INTO chunks (source, ord, section, content, token_count) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._cache.pop(source_url, None)
+
+    def get_article(self, source_url: str) -> List[StoredChunk]:
+        with self._lock:
+            cached = self._cache.get(source_url)
+            if cached is not None:
+                self._cache.move_to_end(source_url)
+                metrics.increment("chunk_store_reads_total", outcome="cache_hit")
+                return cached
+
+            rows = self._conn.execute(
+                "SELECT ord, section, content, token_count FROM chunks WHERE source = ? ORDER BY ord",
+                (source_url,)
+            ).fetchall()
+            chunks = [
+                StoredChunk(content=content, section_title=section, order=order, token_count=token_count)
+                for order, section, content, token_count in rows
+            ]
+            metrics.increment("chunk_store_reads_total", outcome="cache_miss")
+
+            if chunks:
+                self._cache[source_url] = chunks
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return chunks
+
+    def merge_from(self, other_path: Path) -> int:
+        """Copy every article of another chunk store file into this one. Returns the rows copied."""
+        with self._lock:
+            self._conn.execute("ATTACH DATABASE ? AS segment", (str(other_path),))
+            try:
+                with self._conn:
+                    copied = self._conn.execute(
+                        "INSERT OR REPLACE INTO chunks (source, ord, section, content, token_count) "
+                        "SELECT source, ord, section, content, token_count FROM segment.chunks"
+                    ).rowcount
+            finally:
+                self._conn.execute("DETACH DATABASE segment")
+            self._cache.clear()
+        return copied
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._cache.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,223 @@
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+from application.config import settings
+from application.services.metrics import metrics
+from infrastructure.db.chroma_db import ChromaDB
+from infrastructure.db.segments import PARTITION_HASH
+from infrastructure.db.sharded_db import ShardedVectorDB
+from infrastructure.db.snapshots import (
+    CHROMA_DIR_NAME, CHUNK_STORE_FILE_NAME, KEYWORDS_FILE_NAME, SHARDS_DIR_NAME, SnapshotManager
+)
+from infrastructure.db.vector_db import IVectorDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class IndexHandle:
+    """
+    An opened index snapshot. Requests take one handle and use it throughout.
+
+    Users are reference-counted: once the registry retires a handle, its
+    database is closed as soon as the last request using it releases it.
+    """
+
+    def __init__(self, version: str | None, path: Path | None, db: IVectorDatabase):
+        self.version = version
+        self.path = path
+        self.db = db
+        self._lock = threading.Lock()
+        self._users = 0
+        self._retired = False
+
+    def acquire(self) -> bool:
+        """Register a user. Returns False if the handle was retired in the meantime."""
+        with self._lock:
+            if self._retired:
+                return False
+            self._users += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            idle = self._retired and self._users == 0
+        if idle:
+            self._close()
+
+    def retire(self) -> None:
+        """Close the handle once its in-flight users are done. No new users are accepted."""
+        with self._lock:
+            self._retired = True
+            idle = self._users == 0
+        if idle:
+            self._close()
+        else:
+            logger.info("Index snapshot %s retired, closing after %d in-flight request(s).", self.version, self._users)
+
+    def _close(self) -> None:
+        try:
+            self.db.close()
+            logger.info("Closed index snapshot %s", self.version)
+        except Exception as e:
+            logger.error("Failed to close index snapshot %s: %s", self.version, e)
+
+
+class IndexRegistry:
+    """
+    Holds the index snapshot currently served by the API and swaps it at runtime.
+
+    A new snapshot is fully opened before it replaces the old handle in a single
+    reference assignment, so in-flight requests finish on the snapshot they
+    started with and new requests see only the new one. The old handle is
+    retired and closed once those in-flight requests release it.
+    """
+
+    def __init__(self, snapshots: SnapshotManager):
+        self.snapshots = snapshots
+        self._swap_lock = threading.RLock()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        version = snapshots.current_version()
+        if version is None:
+            logger.warning("No published index snapshot found, serving the legacy index at '%s'.", settings.CHROMADB_DIR)
+        self._handle = self._open(version)
+
+    def current(self) -> IndexHandle:
+        """The served handle, for its version and path. Queries go through `use()`."""
+        return self._handle
+
+    @contextmanager
+    def use(self) -> Iterator[IndexHandle]:
+        """Hold the served handle open for the duration of the block."""
+        handle = self._handle
+        # A swap may retire the handle between the read and the acquire; the
+        # replacement is already assigned by then, so the retry picks it up.
+        while not handle.acquire():
+            handle = self._handle
+        try:
+            yield handle
+        finally:
+            handle.release()
+
+    def reload(self) -> bool:
+        """Switch to the published snapshot if it differs from the served one. Returns True on swap."""
+        version = self.snapshots.current_version()
+        if version is None or version == self._handle.version:
+            return False
+        self._swap(version)
+        return True
+
+    def activate(self, version: str) -> None:
+        """Publish `version` and start serving it."""
+        self._swap(version, publish=lambda: self.snapshots.publish(version))
+
+    def rollback(self) -> str:
+        """Re-publish and serve the previously published snapshot."""
+        with self._swap_lock:
+            # CURRENT is only rewritten once the previous snapshot has been checked and opened.
+            version = self.snapshots.previous_version()
+            self._swap(version, publish=self.snapshots.rollback)
+        return version
+
+    def start_watching(self, interval: float = settings.INDEX_WATCH_INTERVAL_SECONDS) -> None:
+        """Poll the CURRENT pointer in the background and swap when a new snapshot is published."""
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error("Failed to reload index snapshot: %s", e)
+
+        self._watcher = threading.Thread(target=watch, name="index-snapshot-watcher", daemon=True)
+        self._watcher.start()
+        logger.info("Watching '%s' for new snapshots every %ss.", self.snapshots.root, interval)
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+    def _swap(self, version: str, publish: Callable[[], object] | None = None) -> None:
+        """Serve `version`, calling `publish` (which updates CURRENT) only once it is open."""
+        with self._swap_lock:
+            if version == self._handle.version:
+                if publish:
+                    publish()
+                return
+            self._check_compatible(version)
+            handle = self._open(version, reuse_models_from=self._handle.db)
+            if publish:
+                try:
+                    publish()
+                except Exception:
+                    handle.retire()
+                    raise
+            previous = self._handle
+            self._handle = handle
+            metrics.increment("index_swaps_total")
+        logger.info("Swapped index snapshot %s -> %s", previous.version, version)
+        previous.retire()
+
+    def _check_compatible(self, version: str) -> None:
+        manifest = self.snapshots.read_manifest(version)
+        model = manifest.get("embedding_model")
+        if model != settings.EMBEDDING_MODEL:
+            raise ValueError(
+                f"Snapshot '{version}' was built with embedding model '{model}', "
+                f"but the server uses '{settings.EMBEDDING_MODEL}'."
+            )
+
+    def _open(self, version: str | None, reuse_models_from: IVectorDatabase | None = None) -> IndexHandle:
+        models = {}
+        if isinstance(reuse_models_from, ChromaDB):
+            models = {
+                "embedding_model": reuse_models_from.embedding_model,
+                "keyword_model": reuse_models_from.keyword_indexer.model,
+            }
+        elif isinstance(reuse_models_from, ShardedVectorDB):
+            models = {
+                "embedding_model": reuse_models_from.embedding_model,
+                "keyword_model": reuse_models_from.keyword_model,
+            }
+
+        if version is None:
+            return IndexHandle(None, None, ChromaDB(read_only=True, **models))
+
+        path = self.snapshots.path(version)
+        sharding = self.snapshots.read_manifest(version).get("shards")
+        if sharding:
+            db = self._open_shards(path / SHARDS_DIR_NAME, sharding, models)
+        else:
+            db = self._open_chroma(path, models)
+        logger.info("Opened index snapshot %s", version)
+        return IndexHandle(version, path, db)
+
+    @staticmethod
+    def _open_chroma(path: Path, models: dict) -> ChromaDB:
+        return ChromaDB(
+            persist_dir=path / CHROMA_DIR_NAME,
+            keywords_file=path / KEYWORDS_FILE_NAME,
+            chunk_store_file=path / CHUNK_STORE_FILE_NAME,
+            read_only=True,
+            **models
+        )
+
+    def _open_shards(self, shards_dir: Path, sharding: dict, models: dict) -> ShardedVectorDB:
+        shards = []
+        for name in sharding["names"]:
+            shard = self._open_chroma(shards_dir / name, models)
+            # All shards share one copy of the models.
+            models = {"embedding_model": shard.embedding_model, "keyword_model": shard.keyword_indexer.model}
+            shards.append(shard)
+        roles = sharding.get("roles")
+        return ShardedVectorDB(
+            shards,
+            partition=sharding.get("partition", PARTITION_HASH),
+            shard_roles=[roles.get(name, []) for name in sharding["names"]] if roles else None
+        )
@@ -10,8 +10,8 @@ logger = logging.getLogger(__name__)
 
 
 class KeywordIndexer:
-    def __init__(self, cache_path: Path = Path("keyword_map.json")):
-        self.model = KeyBERT()
+    def __init__(self, cache_path: Path = Path("keyword_map.json"), model: KeyBERT | None = None):
+        self.model = model or KeyBERT()
         self.keyword_map: Dict[str, List[str]] = {}
         self.cache_path = cache_path
         self._load_cache()
@@ -41,7 +41,10 @@ class KeywordIndexer:
         extracted = self.extract_keywords(query, top_n, min_confidence)
         keywords = [kw for kw, _ in extracted]
         logger.debug("Extracted keywords from query '%s': %s", query, keywords)
+        return self.match_keywords(keywords)
 
+    def match_keywords(self, keywords: List[str]) -> List[str]:
+        """Map extracted query keywords to the ones present in this index, falling back to single words."""
         matched_keywords = set()
 
         for kw in keywords:
@@ -64,7 +67,9 @@ class KeywordIndexer:
         keywords = self.extract_keywords(chunk.content, top_n, min_confidence)
         logger.debug("Indexing chunk %s with keywords: %s", chunk_id, [kw for kw, _ in keywords])
         for kw, _ in keywords:
-            self.keyword_map.setdefault(kw, []).append(chunk_id)
+            chunk_ids = self.keyword_map.setdefault(kw, [])
+            if chunk_id not in chunk_ids:
+                chunk_ids.append(chunk_id)
 
     def save_cache(self):
         try:
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from application.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime for the universal hash family; 31-bit operands keep a * x + b within uint64.
+MERSENNE_PRIME = (1 << 31) - 1
+HASH_SEED = 1
+
+
+class NearDuplicateDetector:
+    """
+    MinHash-based near-duplicate detector for chunks seen during ingestion.
+
+    Each chunk is reduced to the set of its word shingles, and a MinHash
+    signature of `num_perm` values estimates the Jaccard similarity between two
+    such sets. Signatures are split into `bands` bands and bucketed by band
+    value (LSH), so only chunks sharing a bucket are compared. A chunk is a
+    duplicate if its estimated similarity to a bucket mate is at least
+    `min_similarity`. With the default 32 bands of 4 rows, pairs at 0.85
+    similarity share a bucket with probability > 0.9999.
+
+    The default threshold only collapses near-identical text: reformatted
+    boilerplate, or a small edit in a long paragraph. A single changed word in
+    a short sentence ("every 30 days" / "every 90 days") usually changes a
+    fact, so such chunks stay separate.
+    """
+
+    def __init__(
+            self,
+            min_similarity: float = settings.DEDUP_MIN_SIMILARITY,
+            shingle_size: int = settings.DEDUP_SHINGLE_SIZE,
+            min_chars: int = settings.DEDUP_MIN_CHARS,
+            num_perm: int = settings.DEDUP_NUM_PERM,
+            bands: int = settings.DEDUP_BANDS
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        self.min_similarity = min_similarity
+        self.shingle_size = shingle_size
+        self.min_chars = min_chars
+        self.num_perm = num_perm
+        self.rows = num_perm // bands
+
+        # Deterministic permutations, so segments built by separate workers hash alike.
+        rng = np.random.RandomState(HASH_SEED)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+        self._buckets: Dict[Tuple[str, int, bytes], List[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+
+        self.chunks_seen = 0
+        self.chunks_collapsed = 0
+        self.chars_collapsed = 0
+
+    def find_duplicate(self, text: str, scope: str) -> str | None:
+        """Return the id of an indexed chunk in `scope` that `text` nearly duplicates, if any."""
+        self.chunks_seen += 1
+        if len(text) < self.min_chars:
+            return None
+
+        signature = self.minhash(text)
+        checked = set()
+        for key in self._band_keys(signature, scope):
+            for chunk_id in self._buckets.get(key, []):
+                if chunk_id in checked:
+                    continue
+                checked.add(chunk_id)
+                if self.similarity(signature, self._signatures[chunk_id]) >= self.min_similarity:
+                    self.chunks_collapsed += 1
+                    self.chars_collapsed += len(text)
+                    return chunk_id
+        return None
+
+    def add(self, chunk_id: str, text: str, scope: str) -> None:
+        """Register an indexed chunk as a canonical candidate for later duplicates."""
+        if len(text) < self.min_chars:
+            return
+
+        signature = self.minhash(text)
+        self._signatures[chunk_id] = signature
+        for key in self._band_keys(signature, scope):
+            self._buckets.setdefault(key, []).append(chunk_id)
+
+    def minhash(self, text: str) -> np.ndarray:
+        words = re.findall(r"\w+", text.lower())
+        n = self.shingle_size
+        shingles = {" ".join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big")
+                for shingle in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles)
+        ) % MERSENNE_PRIME
+        return ((np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME).min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return float(np.count_nonzero(signature == other)) / len(signature)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "chunks_seen": self.chunks_seen,
+            "chunks_collapsed": self.chunks_collapsed,
+            "chars_collapsed": self.chars_collapsed,
+            "collapse_ratio": round(self.chunks_collapsed / self.chunks_seen, 4) if self.chunks_seen else 0.0,
+        }
+
+    def _band_keys(self, signature: np.ndarray, scope: str) -> List[Tuple[str, int, bytes]]:
+        return [
+            (scope, i, signature[start:start + self.rows].tobytes())
+            for i, start in enumerate(range(0, self.num_perm, self.rows))
+        ]
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Set
+
+import numpy as np
+from chromadb import PersistentClient
+
+from application.config import settings
+from core.models.document import Document
+from infrastructure.db.chroma_db import COLLECTION_NAME, add_duplicate_sources, hnsw_metadata
+from infrastructure.db.chunk_store import ChunkStore
+from infrastructure.db.near_duplicates import NearDuplicateDetector
+from infrastructure.db.snapshots import CHROMA_DIR_NAME, CHUNK_STORE_FILE_NAME, KEYWORDS_FILE_NAME, SHARDS_DIR_NAME
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MANIFEST_FILE = "segment.json"
+PROGRESS_FILE = "progress.log"
+PAGE_SIZE = 1000
+
+PARTITION_HASH = "hash"  # by source URL
+PARTITION_ROLE = "role"  # by document role, so searches can skip shards of other roles
+
+
+def shard_of(source_url: str, shards: int) -> int:
+    """Stable shard assignment of a document, identical on every worker and host."""
+    return int(hashlib.sha1(source_url.encode("utf-8")).hexdigest(), 16) % shards
+
+
+def assign_shard(document: Document, shards: int, partition: str = PARTITION_HASH) -> int:
+    if partition == PARTITION_ROLE:
+        if document.role in settings.DOC_ROLES:
+            return settings.DOC_ROLES.index(document.role) % shards
+        return shard_of(document.role, shards)
+    return shard_of(document.source_url, shards)
+
+
+def segment_name(shard: int, shards: int) -> str:
+    return f"shard-{shard:03d}-of-{shards:03d}"
+
+
+class SegmentCheckpoint:
+    """
+    Progress of a worker building one index segment:
+
+        <segment>/
+            progress.log     # sources fully indexed, one per line, append-only
+            segment.json     # written once the whole shard is indexed
+
+    A source is appended only after its vectors, chunks and keywords are on disk,
+    so a restarted worker skips exactly the documents that are already complete.
+    """
+
+    def __init__(self, segment_dir: Path):
+        self.segment_dir = segment_dir
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.progress_path = segment_dir / PROGRESS_FILE
+        self.manifest_path = segment_dir / SEGMENT_MANIFEST_FILE
+
+    def completed_sources(self) -> Set[str]:
+        if not self.progress_path.exists():
+            return set()
+        with open(self.progress_path, "r", encoding="utf-8") as f:
+            # A line without its newline was cut short by a crash and doesn't count.
+            return {line[:-1] for line in f if line.endswith("\n")}
+
+    def mark_done(self, source_url: str) -> None:
+        with open(self.progress_path, "a", encoding="utf-8") as f:
+            f.write(source_url + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_complete(self) -> bool:
+        return self.manifest_path.exists()
+
+    def read_manifest(self) -> Dict:
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def complete(self, manifest: Dict) -> None:
+        manifest = {
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "embedding_model": settings.EMBEDDING_MODEL,
+            **manifest,
+        }
+        tmp_path = self.manifest_path.with_name(f".{SEGMENT_MANIFEST_FILE}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        logger.info("Segment '%s' complete", self.segment_dir.name)
+
+
+def merge_segments(segment_dirs: List[Path], target_dir: Path, hnsw: Dict[str, str | int] | None = None) -> Dict:
+    """
+    Combine completed index segments into a single index in `target_dir`.
+
+    Vectors are copied as-is (no re-embedding). Near-duplicates are collapsed
+    again across segments, since each worker only saw its own shard.
+    Returns merge statistics for the snapshot manifest.
+    """
+    manifests = _read_segment_manifests(segment_dirs)
+
+    target_client = PersistentClient(path=str((target_dir / CHROMA_DIR_NAME).absolute()))
+    target = target_client.get_or_create_collection(COLLECTION_NAME, metadata=hnsw or hnsw_metadata())
+    deduplicator = NearDuplicateDetector() if settings.DEDUP_ENABLED else None
+    duplicate_sources: Dict[str, set] = {}
+    collapsed_ids: Set[str] = set()
+
+    for segment_dir in segment_dirs:
+        client = PersistentClient(path=str((segment_dir / CHROMA_DIR_NAME).absolute()))
+        collection = client.get_collection(COLLECTION_NAME)
+        logger.info("Merging %d chunks from segment '%s'", collection.count(), segment_dir.name)
+
+        for offset in range(0, collection.count(), PAGE_SIZE):
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=PAGE_SIZE,
+                offset=offset
+            )
+            kept = []
+            for chunk_id, embedding, doc, meta in zip(page["ids"], page["embeddings"], page["documents"], page["metadatas"]):
+                # Title chunks are always kept so every article stays addressable.
+                canonical_id = deduplicator.find_duplicate(doc, meta.get("role")) \
+                    if deduplicator and meta.get("order", 0) > 0 else None
+                if canonical_id:
+                    sources = duplicate_sources.setdefault(canonical_id, set())
+                    sources.add(meta.get("source"))
+                    sources.update(json.loads(meta.get("duplicate_sources", "[]")))
+                    collapsed_ids.add(chunk_id)
+                    continue
+                if deduplicator:
+                    deduplicator.add(chunk_id, doc, meta.get("role"))
+                kept.append((chunk_id, embedding, doc, meta))
+
+            if kept:
+                target.upsert(
+                    ids=[chunk_id for chunk_id, _, _, _ in kept],
+                    embeddings=np.asarray([embedding for _, embedding, _, _ in kept], dtype=np.float32).tolist(),
+                    documents=[doc for _, _, doc, _ in kept],
+                    metadatas=[meta for _, _, _, meta in kept],
+                )
+
+    if duplicate_sources:
+        add_duplicate_sources(target, duplicate_sources)
+
+    keyword_map: Dict[str, List[str]] = {}
+    for segment_dir in segment_dirs:
+        keywords_file = segment_dir / KEYWORDS_FILE_NAME
+        if not keywords_file.exists():
+            continue
+        with open(keywords_file, "r", encoding="utf-8") as f:
+            for kw, chunk_ids in json.load(f).items():
+                merged = keyword_map.setdefault(kw, [])
+                merged.extend(chunk_id for chunk_id in chunk_ids if chunk_id not in collapsed_ids)
+    keyword_map = {kw: list(dict.fromkeys(chunk_ids)) for kw, chunk_ids in keyword_map.items() if chunk_ids}
+    with open(target_dir / KEYWORDS_FILE_NAME, "w", encoding="utf-8") as f:
+        json.dump(keyword_map, f, ensure_ascii=False, indent=2)
+
+    chunk_store = ChunkStore(target_dir / CHUNK_STORE_FILE_NAME)
+    try:
+        for segment_dir in segment_dirs:
+            chunk_store.merge_from(segment_dir / CHUNK_STORE_FILE_NAME)
+    finally:
+        chunk_store.close()
+
+    dedup = deduplicator.stats() if deduplicator else {}
+    logger.info(
+        "Merged %d segment(s) into %d chunks (%d collapsed across segments).",
+        len(segment_dirs), target.count(), len(collapsed_ids)
+    )
+    return {
+        "documents": sum(m.get("documents", 0) for m in manifests),
+        "chunks": target.count(),
+        "dedup": dedup,
+        "segments": [
+            {"name": d.name, "documents": m.get("documents", 0), "chunks": m.get("chunks", 0)}
+            for d, m in zip(segment_dirs, manifests)
+        ],
+    }
+
+
+def assemble_shards(segment_dirs: List[Path], target_dir: Path) -> Dict:
+    """
+    Move completed segments into `target_dir` as the shards of a sharded snapshot,
+    served by ShardedVectorDB instead of being merged into one collection.
+    Returns the manifest entries describing the shards.
+    """
+    manifests = _read_segment_manifests(segment_dirs)
+    partitions = {m.get("partition", PARTITION_HASH) for m in manifests}
+    if len(partitions) != 1:
+        raise ValueError(f"Segments were built with different partitionings: {sorted(partitions)}")
+
+    shards_dir = target_dir / SHARDS_DIR_NAME
+    shards_dir.mkdir(parents=True)
+    for segment_dir in segment_dirs:
+        shard_dir = shards_dir / segment_dir.name
+        shard_dir.mkdir()
+        for name in (CHROMA_DIR_NAME, KEYWORDS_FILE_NAME, CHUNK_STORE_FILE_NAME):
+            if (segment_dir / name).exists():
+                shutil.move(str(segment_dir / name), str(shard_dir / name))
+
+    logger.info("Assembled %d segment(s) as shards in '%s'", len(segment_dirs), shards_dir)
+    return {
+        "documents": sum(m.get("documents", 0) for m in manifests),
+        "chunks": sum(m.get("chunks", 0) for m in manifests),
+        "shards": {
+            "partition": partitions.pop(),
+            "names": [d.name for d in segment_dirs],
+            "roles": {d.name: m.get("roles", []) for d, m in zip(segment_dirs, manifests)},
+        },
+    }
+
+
+def _read_segment_manifests(segment_dirs: List[Path]) -> List[Dict]:
+    manifests = []
+    for segment_dir in segment_dirs:
+        checkpoint = SegmentCheckpoint(segment_dir)
+        if not checkpoint.is_complete():
+            raise ValueError(f"Segment '{segment_dir}' is not complete.")
+        manifest = checkpoint.read_manifest()
+        if manifest.get("embedding_model") != settings.EMBEDDING_MODEL:
+            raise ValueError(
+                f"Segment '{segment_dir}' was built with embedding model '{manifest.get('embedding_model')}', "
+                f"expected '{settings.EMBEDDING_MODEL}'."
+            )
+        manifests.append(manifest)
+    return manifests
@@ -0,0 +1,187 @@
+import heapq
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List
+
+from application.config import settings
+from application.services.deadline import Deadline
+from application.services.metrics import metrics
+from core.models.document import Document, StoredChunk
+from infrastructure.db.chroma_db import ChromaDB
+from infrastructure.db.segments import PARTITION_HASH, PARTITION_ROLE, assign_shard, shard_of
+from infrastructure.db.vector_db import IVectorDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedVectorDB(IVectorDatabase):
+    """
+    Scatter-gather over several ChromaDB shards of one index.
+
+    The query's keywords and embedding are computed once, then every shard that
+    can hold matching chunks is searched in parallel. Each shard returns its own
+    top-k, and the sorted partial lists are merged with a heap. A shard that
+    doesn't answer within `shard_timeout` is left out, so a slow or broken shard
+    degrades the results instead of failing the request.
+
+    Every shard has its own executor of `shard_workers` threads. Searches that
+    time out keep their thread until the shard answers, so a hung shard only
+    exhausts its own executor. Once all of its threads are busy, the shard is
+    skipped outright rather than queueing more searches behind the stuck ones.
+    """
+
+    def __init__(
+            self,
+            shards: List[ChromaDB],
+            partition: str = PARTITION_HASH,
+            shard_roles: List[List[str]] | None = None,
+            shard_timeout: float = settings.SHARD_SEARCH_TIMEOUT_SECONDS,
+            shard_workers: int = settings.SHARD_SEARCH_WORKERS
+    ):
+        if not shards:
+            raise ValueError("ShardedVectorDB needs at least one shard.")
+        self.shards = shards
+        self.partition = partition
+        self.shard_roles = shard_roles
+        self.shard_timeout = shard_timeout
+        self.shard_workers = shard_workers
+        self._pools = [
+            ThreadPoolExecutor(max_workers=shard_workers, thread_name_prefix=f"shard-search-{i}")
+            for i in range(len(shards))
+        ]
+        self._outstanding = [0] * len(shards)
+        self._outstanding_lock = threading.Lock()
+        logger.info("ShardedVectorDB initialized with %d shard(s), partitioned by %s", len(shards), partition)
+
+    @property
+    def embedding_model(self):
+        return self.shards[0].embedding_model
+
+    @property
+    def keyword_model(self):
+        return self.shards[0].keyword_indexer.model
+
+    def add_documents(self, documents: List[Document]) -> None:
+        by_shard: Dict[int, List[Document]] = {}
+        for document in documents:
+            by_shard.setdefault(assign_shard(document, len(self.shards), self.partition), []).append(document)
+        for i, shard_documents in by_shard.items():
+            self.shards[i].add_documents(shard_documents)
+
+    def search(
+            self,
+            query: str,
+            filter_roles: List[str],
+            top_k: int = 3,
+            deadline: Deadline | None = None
+    ) -> List[Dict]:
+        logger.info("Searching %d shard(s) for query: '%s'", len(self.shards), query)
+        deadline = deadline or Deadline()
+        extracted = [kw for kw, _ in self.shards[0].keyword_indexer.extract_keywords(query)]
+        deadline.check()
+
+        targets = self._route(filter_roles)
+        keywords = {i: self.shards[i].keyword_indexer.match_keywords(extracted) for i in targets}
+        candidates = {i: self.shards[i].candidate_ids(keywords[i]) for i in targets}
+
+        # Same semantics as a single index: once any shard matches a keyword,
+        # only keyword candidates count, so shards without candidates are skipped.
+        strict_mode = not any(candidates.values())
+        if strict_mode:
+            logger.info("No keyword match found. Fallback to strict vector filtering.")
+        else:
+            targets = [i for i in targets if candidates[i]]
+
+        embedding = self.embedding_model.encode(query).tolist()
+        deadline.check()
+
+        futures = {}
+        for i in targets:
+            future = self._submit(
+                i,
+                embedding,
+                filter_roles,
+                top_k,
+                keywords[i],
+                candidates[i] or None,
+                strict_mode
+            )
+            if future is None:
+                logger.warning("Shard %d has %d search(es) outstanding, skipping it.", i, self.shard_workers)
+                metrics.increment("shard_searches_total", outcome="busy")
+            else:
+                futures[future] = i
+        done, not_done = wait(futures, timeout=deadline.timeout(self.shard_timeout))
+        deadline.check()
+
+        partials = []
+        for future in done:
+            try:
+                partials.append(future.result())
+                metrics.increment("shard_searches_total", outcome="ok")
+            except Exception as e:
+                logger.error("Search on shard %d failed: %s", futures[future], e)
+                metrics.increment("shard_searches_total", outcome="error")
+        for future in not_done:
+            logger.warning("Shard %d did not answer within %.1fs, results are partial.", futures[future], self.shard_timeout)
+            metrics.increment("shard_searches_total", outcome="timeout")
+
+        merged = []
+        seen_docs = set()
+        for result in heapq.merge(*partials, key=lambda r: r["distance"]):
+            if result["content"] in seen_docs:
+                continue
+            seen_docs.add(result["content"])
+            merged.append(result)
+            if len(merged) == top_k:
+                break
+
+        logger.info("Returning %d result(s) from %d of %d shard(s).", len(merged), len(partials), len(targets))
+        return merged
+
+    def get_chunks_by_source(self, source_url: str) -> List[str]:
+        return [chunk.content for chunk in self.get_article_chunks(source_url)]
+
+    def get_article_chunks(self, source_url: str) -> List[StoredChunk]:
+        if self.partition == PARTITION_HASH:
+            return self.shards[shard_of(source_url, len(self.shards))].get_article_chunks(source_url)
+
+        # The owning shard isn't derivable from the URL: ask the chunk stores, then fall back to a scan.
+        for shard in self.shards:
+            chunks = shard.chunk_store.get_article(source_url) if shard.chunk_store else []
+            if chunks:
+                return chunks
+        for shard in self.shards:
+            chunks = shard.get_article_chunks(source_url)
+            if chunks:
+                return chunks
+        return []
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return self.shards[0].embed_texts(texts)
+
+    def close(self) -> None:
+        for pool in self._pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for shard in self.shards:
+            shard.close()
+
+    def _submit(self, i: int, *args) -> Future | None:
+        """Run a search on shard `i`, or return None if all of its workers are still busy."""
+        with self._outstanding_lock:
+            if self._outstanding[i] >= self.shard_workers:
+                return None
+            self._outstanding[i] += 1
+        future = self._pools[i].submit(self.shards[i].search_by_embedding, *args)
+        future.add_done_callback(lambda _: self._finish(i))
+        return future
+
+    def _finish(self, i: int) -> None:
+        with self._outstanding_lock:
+            self._outstanding[i] -= 1
+
+    def _route(self, filter_roles: List[str]) -> List[int]:
+        if self.partition != PARTITION_ROLE or self.shard_roles is None:
+            return list(range(len(self.shards)))
+        return [i for i, roles in enumerate(self.shard_roles) if set(roles) & set(filter_roles)]
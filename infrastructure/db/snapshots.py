@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+from application.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+HISTORY_FILE = "history.json"
+STAGING_PREFIX = ".staging-"
+STAGING_MAX_AGE_SECONDS = 24 * 60 * 60
+
+CHROMA_DIR_NAME = "chroma_db"
+KEYWORDS_FILE_NAME = "keyword_map.json"
+CHUNK_STORE_FILE_NAME = "chunks.sqlite"
+SHARDS_DIR_NAME = "shards"
+
+
+class SnapshotManager:
+    """
+    Manages immutable, versioned index snapshots on disk:
+
+        snapshots/
+            CURRENT                 # version served by the API
+            history.json            # published versions, oldest first
+            <version>/
+                manifest.json
+                chroma_db/
+                keyword_map.json
+                chunks.sqlite
+                shards/<name>/      # sharded snapshots: the three above per shard
+
+    A snapshot is built in a staging directory, renamed into place once complete
+    and never modified afterwards. Publishing rewrites CURRENT atomically.
+    """
+
+    def __init__(self, root: Path = settings.INDEX_SNAPSHOTS_DIR):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def begin(self) -> Path:
+        """Create an empty staging directory for a new snapshot."""
+        version = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + "-" + uuid.uuid4().hex[:6]
+        staging = self.root / f"{STAGING_PREFIX}{version}"
+        staging.mkdir(parents=True)
+        logger.info("Building snapshot in staging directory '%s'", staging)
+        return staging
+
+    def commit(self, staging: Path, manifest: Dict) -> str:
+        """Write the manifest and move the staged snapshot into place. Returns its version."""
+        version = staging.name[len(STAGING_PREFIX):]
+        manifest = {
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "embedding_model": settings.EMBEDDING_MODEL,
+            **manifest,
+        }
+        self._write_json(staging / MANIFEST_FILE, manifest)
+        os.replace(staging, self.path(version))
+        logger.info("Committed snapshot %s", version)
+        return version
+
+    def publish(self, version: str) -> None:
+        """Make `version` the snapshot served by the API."""
+        if version not in self.list_versions():
+            raise ValueError(f"Snapshot '{version}' does not exist.")
+
+        history = [v for v in self._read_history() if v != version]
+        history.append(version)
+        self._write_json(self.root / HISTORY_FILE, history)
+        self._write_text(self.root / CURRENT_FILE, version)
+        logger.info("Published snapshot %s", version)
+
+    def previous_version(self) -> str:
+        """The snapshot `rollback` would re-publish, without changing anything."""
+        return self._rollback_history()[-1]
+
+    def rollback(self) -> str:
+        """Re-publish the previously published snapshot. Returns its version."""
+        current = self.current_version()
+        history = self._rollback_history()
+        previous = history[-1]
+        self._write_json(self.root / HISTORY_FILE, history)
+        self._write_text(self.root / CURRENT_FILE, previous)
+        logger.warning("Rolled back from snapshot %s to %s", current, previous)
+        return previous
+
+    def current_version(self) -> str | None:
+        current_file = self.root / CURRENT_FILE
+        if not current_file.exists():
+            return None
+        version = current_file.read_text(encoding="utf-8").strip()
+        return version or None
+
+    def list_versions(self) -> List[str]:
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if p.is_dir() and not p.name.startswith(STAGING_PREFIX) and (p / MANIFEST_FILE).exists()
+        )
+
+    def path(self, version: str) -> Path:
+        return self.root / version
+
+    def read_manifest(self, version: str) -> Dict:
+        with open(self.path(version) / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def garbage_collect(self, keep: int = settings.INDEX_SNAPSHOTS_KEEP) -> List[str]:
+        """
+        Delete snapshots that are neither current nor among the `keep` most recently
+        published, plus abandoned staging directories. Returns the deleted versions.
+
+        The version published before the current one is always kept, whatever `keep`
+        is: the API keeps serving it until it notices the new CURRENT, and in-flight
+        requests may still read it after the swap.
+        """
+        history = self._read_history()
+        protected = set(history[-keep:]) if keep > 0 else set()
+        current = self.current_version()
+        if current:
+            protected.add(current)
+            if current in history and history.index(current) > 0:
+                protected.add(history[history.index(current) - 1])
+
+        deleted = []
+        for version in self.list_versions():
+            if version in protected:
+                continue
+            # Snapshots committed after the last publish may be about to go live.
+            if current and version > current:
+                continue
+            shutil.rmtree(self.path(version), ignore_errors=True)
+            deleted.append(version)
+
+        for staging in self.root.glob(f"{STAGING_PREFIX}*"):
+            if time.time() - staging.stat().st_mtime > STAGING_MAX_AGE_SECONDS:
+                shutil.rmtree(staging, ignore_errors=True)
+
+        if deleted:
+            logger.info("Garbage-collected %d snapshot(s): %s", len(deleted), deleted)
+        return deleted
+
+    def _rollback_history(self) -> List[str]:
+        """Published history up to, and excluding, the current version."""
+        current = self.current_version()
+        history = [v for v in self._read_history() if v in self.list_versions()]
+        if current in history:
+            history = history[:history.index(current)]
+        if not history:
+            raise ValueError("No previous snapshot to roll back to.")
+        return history
+
+    def _read_history(self) -> List[str]:
+        history_file = self.root / HISTORY_FILE
+        if not history_file.exists():
+            return []
+        with open(history_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, path: Path, data) -> None:
+        self._write_text(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def _write_text(path: Path, text: str) -> None:
+        # Write-then-rename so readers never see a partial file.
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
@@ -2,7 +2,8 @@ import logging
 from abc import ABC, abstractmethod
 from typing import List
 
-from core.models.document import Document
+from application.services.deadline import Deadline
+from core.models.document import Document, StoredChunk
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +25,13 @@ class IVectorDatabase(ABC):
         pass
 
     @abstractmethod
-    def search(self, query: str, filter_roles: List[str], top_k: int = 3) -> List[Document]:
+    def search(
+            self,
+            query: str,
+            filter_roles: List[str],
+            top_k: int = 3,
+            deadline: Deadline | None = None
+    ) -> List[Document]:
         """
         Perform a search in the vector database using a query and optional role filter.
 
@@ -32,9 +39,14 @@ class IVectorDatabase(ABC):
             query (str): User input or search query.
             filter_roles (List[str]): List of user roles for filtering.
             top_k (int): Max number of results to return (default: 3).
+            deadline (Deadline | None): Request time budget, checked between search stages.
 
         Returns:
             List[Document]: Ranked list of relevant document chunks.
+
+        Raises:
+            DeadlineExceeded: The deadline expired during the search.
+            RequestCancelled: The deadline was cancelled by the caller.
         """
         pass
 
@@ -50,3 +62,37 @@ class IVectorDatabase(ABC):
             List[str]: Ordered list of document chunk texts.
         """
         pass
+
+    @abstractmethod
+    def get_article_chunks(self, source_url: str) -> List[StoredChunk]:
+        """
+        Get an article's chunks with their section titles and token counts.
+
+        Args:
+            source_url (str): Original source identifier.
+
+        Returns:
+            List[StoredChunk]: Chunks in reading order.
+        """
+        pass
+
+    @abstractmethod
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts with the same model used for indexing.
+
+        Args:
+            texts (List[str]): Texts to embed in one batch.
+
+        Returns:
+            List[List[float]]: One embedding per input text.
+        """
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Release the database's files, connections and worker threads.
+        The instance must not be used afterwards.
+        """
+        pass
@@ -1,11 +1,16 @@
 import logging
 from abc import ABC, abstractmethod
 
+from application.services.deadline import Deadline
 from core.models.llm import LLMRequest, LLMResponse
 
 logger = logging.getLogger(__name__)
 
 
+class LLMServiceError(Exception):
+    """Raised when the LLM service fails to produce a completion (connection, HTTP or protocol error)."""
+
+
 class ILLMService(ABC):
     """
     Interface for communication with a Language Model (LLM) service.
@@ -13,14 +18,21 @@ class ILLMService(ABC):
     """
 
     @abstractmethod
-    def chat_completion(self, request: LLMRequest) -> LLMResponse:
+    def chat_completion(self, request: LLMRequest, deadline: Deadline | None = None) -> LLMResponse:
         """
         Send a chat completion request to the LLM service.
 
         Args:
             request (LLMRequest): The request object containing messages, tokens, and parameters.
+            deadline (Deadline | None): Time budget and cancellation flag; the upstream
+                call is aborted when it expires or is cancelled.
 
         Returns:
             LLMResponse: The response object containing the generated text and metadata.
+
+        Raises:
+            DeadlineExceeded: The deadline expired before the completion finished.
+            RequestCancelled: The deadline was cancelled by the caller.
+            LLMServiceError: The upstream call failed.
         """
         pass
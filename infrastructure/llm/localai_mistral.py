@@ -1,8 +1,12 @@
+import json
 import logging
+import socket
+
 import requests
 
 from application.config import settings
-from infrastructure.llm.abstract_llm import ILLMService
+from application.services.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from infrastructure.llm.abstract_llm import ILLMService, LLMServiceError
 from core.models.llm import LLMRequest, LLMResponse
 
 logger = logging.getLogger(__name__)
@@ -11,43 +15,126 @@ logger = logging.getLogger(__name__)
 class LocalAIMistral(ILLMService):
     """
     LLM service for interacting with a local OpenAI-compatible API (e.g., LocalAI).
+
+    Completions are streamed so the deadline can be checked between tokens:
+    on expiry or cancellation the connection is closed, which makes the
+    server stop generating instead of finishing an answer nobody will read.
+    Cancellation also shuts the socket down from the cancelling thread, so a
+    read blocked before the first token (prompt prefill) is interrupted too.
     """
 
     def __init__(self, base_url: str = settings.LOCALAI_URL, model: str = "mistral"):
         self.base_url = base_url
         self.endpoint = f"{self.base_url}/v1/chat/completions"
         self.model = model
-        self.timeout = 300  # seconds
+        self.timeout = settings.LLM_TIMEOUT_SECONDS
+        self.connect_timeout = 5  # seconds
         logger.info(f"LocalAIMistral initialized: endpoint={self.endpoint}, model={self.model}")
 
-    def chat_completion(self, request: LLMRequest) -> LLMResponse:
+    def chat_completion(self, request: LLMRequest, deadline: Deadline | None = None) -> LLMResponse:
+        deadline = deadline or Deadline()
         payload = {
             "model": self.model,
             "messages": [m.model_dump() for m in request.messages],
             "max_tokens": request.max_tokens,
             "temperature": request.temperature,
-            "top_p": request.top_p
+            "top_p": request.top_p,
+            "stream": True
         }
 
+        deadline.check()
+        read_timeout = deadline.timeout(self.timeout)
+
         try:
             logger.debug(f"Sending LLM request: {payload}")
-            response = requests.post(self.endpoint, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-
-            data = response.json()
-            logger.info(f"LLM response received. Tokens used: {data.get('usage', {}).get('total_tokens')}")
-            logger.debug(f"LLM raw response: {data}")
+            with requests.post(
+                    self.endpoint,
+                    json=payload,
+                    stream=True,
+                    timeout=(self.connect_timeout, read_timeout)
+            ) as response:
+                unregister = deadline.on_cancel(lambda: self._abort(response))
+                try:
+                    response.raise_for_status()
+                    text, tokens, finish_reason = self._read_stream(response, deadline)
+                finally:
+                    unregister()
+            # A stream aborted on cancellation may end without an error, just early.
+            if deadline.cancelled:
+                raise RequestCancelled("LLM call was cancelled by the caller.")
+            if not text:
+                raise LLMServiceError("LLM returned an empty completion.")
 
+            logger.info(f"LLM response received. Tokens generated: {tokens}")
             return LLMResponse(
-                text=data["choices"][0]["message"]["content"],
-                tokens_used=data["usage"]["total_tokens"],
-                is_truncated=False
+                text=text,
+                tokens_used=tokens,
+                is_truncated=finish_reason == "length"
             )
 
         except requests.exceptions.RequestException as e:
+            # A read timeout mid-stream surfaces as ConnectionError, and an aborted
+            # socket as a broken chunked read: ask the deadline what happened first.
+            if deadline.cancelled:
+                logger.info("LLM request aborted: cancelled by the caller.")
+                raise RequestCancelled("LLM call was cancelled by the caller.") from e
+            if deadline.expired():
+                logger.warning("LLM request aborted: deadline exceeded.")
+                raise DeadlineExceeded("LLM call did not finish before the request deadline.") from e
             logger.error(f"LLM request failed: {e}")
-            return LLMResponse(
-                text=f"LLM error: {str(e)}",
-                tokens_used=0,
-                is_truncated=True
-            )
+            raise LLMServiceError(f"LLM request failed: {e}") from e
+
+    @staticmethod
+    def _abort(response: requests.Response) -> None:
+        """Unblock a pending read on `response` from another thread."""
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+        if sock is None:
+            # http.client detaches the socket from a connection that closes after this
+            # response; it is then only reachable through the response's file object.
+            fp = getattr(getattr(response.raw, "_fp", None), "fp", None)
+            sock = getattr(getattr(fp, "raw", None), "_sock", None)
+        if sock is None:
+            logger.warning("Cannot abort the LLM stream: socket not found.")
+            return
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # already closed
+
+    def _read_stream(self, response: requests.Response, deadline: Deadline) -> tuple[str, int, str | None]:
+        parts: list[str] = []
+        tokens = 0
+        finish_reason = None
+
+        for line in response.iter_lines(decode_unicode=True):
+            # Leaving the loop closes the connection, which aborts generation upstream.
+            deadline.check()
+            if not line or not line.startswith("data:"):
+                continue
+
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            try:
+                event = json.loads(data)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed stream event: {data[:200]!r}")
+                continue
+            if event.get("error"):
+                raise LLMServiceError(f"LLM stream reported an error: {event['error']}")
+
+            # A final usage-only event (OpenAI's include_usage) has no choices.
+            for choice in event.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    parts.append(content)
+                    tokens += 1
+                finish_reason = choice.get("finish_reason") or finish_reason
+
+            # Servers that report usage know the exact completion length; otherwise count delta events.
+            usage = event.get("usage")
+            if usage:
+                tokens = usage.get("completion_tokens", tokens)
+
+        return "".join(parts), tokens, finish_reason
@@ -12,6 +12,8 @@ logging.basicConfig(
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from application.services.metrics import metrics
+from presentation.api.admin_router import router as admin_router
 from presentation.api.rag_router import router as rag_router
 
 logger = logging.getLogger(__name__)
@@ -26,8 +28,14 @@ app.add_middleware(
 )
 
 app.include_router(rag_router, prefix="/api")
+app.include_router(admin_router, prefix="/api/admin")
 
 
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
@@ -0,0 +1,62 @@
+import asyncio
+import hmac
+import logging
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from application.config import settings
+from dependencies import get_index_registry
+from infrastructure.db.index_registry import IndexRegistry
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def require_admin(x_admin_token: str | None = Header(None)) -> None:
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled. Set DOCTHINK_ADMIN_TOKEN to enable it.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+@router.get("/index", dependencies=[Depends(require_admin)])
+async def get_index_status(registry: IndexRegistry = Depends(get_index_registry)) -> dict:
+    return _status(registry)
+
+
+@router.post("/index/reload", dependencies=[Depends(require_admin)])
+async def reload_index(registry: IndexRegistry = Depends(get_index_registry)) -> dict:
+    swapped = await asyncio.to_thread(registry.reload)
+    logger.info(f"Index reload requested. Swapped: {swapped}")
+    return _status(registry)
+
+
+@router.post("/index/activate/{version}", dependencies=[Depends(require_admin)])
+async def activate_index(version: str, registry: IndexRegistry = Depends(get_index_registry)) -> dict:
+    if version not in registry.snapshots.list_versions():
+        raise HTTPException(status_code=404, detail=f"Snapshot '{version}' not found.")
+    try:
+        await asyncio.to_thread(registry.activate, version)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info(f"Activated index snapshot {version}")
+    return _status(registry)
+
+
+@router.post("/index/rollback", dependencies=[Depends(require_admin)])
+async def rollback_index(registry: IndexRegistry = Depends(get_index_registry)) -> dict:
+    try:
+        version = await asyncio.to_thread(registry.rollback)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.warning(f"Rolled back index to snapshot {version}")
+    return _status(registry)
+
+
+def _status(registry: IndexRegistry) -> dict:
+    handle = registry.current()
+    return {
+        "serving": handle.version,
+        "published": registry.snapshots.current_version(),
+        "available": registry.snapshots.list_versions(),
+    }
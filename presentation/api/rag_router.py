@@ -1,22 +1,100 @@
+import asyncio
 import logging
+import time
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
+from application.config import settings
+from application.services.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from application.services.metrics import metrics
+from application.services.query_log import QueryLog
+from application.services.session_store import SessionNotFoundError, SessionStore
 from application.use_cases.rag import RAGUseCase
 from core.models.answer import AnswerResponse
+from core.models.session import SessionResponse
 from core.models.user_query import UserQuery
-from dependencies import get_rag_use_case
+from dependencies import get_query_log, get_rag_use_case, get_session_store
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+DISCONNECT_POLL_INTERVAL = 0.5  # seconds
+CLIENT_CLOSED_REQUEST = 499
+
 
 @router.post("/ask", response_model=AnswerResponse)
 async def ask_question(
+        request: Request,
         query: UserQuery,
-        use_case: RAGUseCase = Depends(get_rag_use_case)
+        use_case: RAGUseCase = Depends(get_rag_use_case),
+        query_log: QueryLog | None = Depends(get_query_log)
 ) -> AnswerResponse:
     logger.info(f"Received query: '{query.question}' with roles: {query.available_roles}")
-    result = use_case.execute(query)
+    metrics.increment("requests_total")
+    started = time.perf_counter()
+    deadline = Deadline(settings.REQUEST_DEADLINE_SECONDS)
+
+    # The use case is blocking, so run it off the event loop and watch the client meanwhile.
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, deadline))
+    try:
+        result = await asyncio.to_thread(use_case.execute, query, deadline)
+    except RequestCancelled:
+        logger.info("Client disconnected, request cancelled.")
+        metrics.increment("requests_cancelled_total")
+        _log_query(query_log, query, started, "cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except DeadlineExceeded:
+        logger.warning("Request deadline exceeded before any answer could be built.")
+        metrics.increment("requests_timed_out_total")
+        _log_query(query_log, query, started, "timeout")
+        raise HTTPException(status_code=504, detail="Request deadline exceeded.")
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    finally:
+        watcher.cancel()
+
     logger.info(f"Generated answer. Complete: {result['is_complete']}. Sources: {result['sources']}")
+    cache = result.pop("cache", "miss")
+    degraded = result.pop("degraded", None)
+    if degraded == "llm_error":
+        outcome = "error"
+    else:
+        outcome = "complete" if result["is_complete"] else "retrieval_only"
+    _log_query(query_log, query, started, outcome, result["sources"], cache)
     return AnswerResponse(**result)
+
+
+@router.post("/sessions", response_model=SessionResponse)
+async def create_session(sessions: SessionStore = Depends(get_session_store)) -> SessionResponse:
+    session = sessions.create()
+    logger.info(f"Created session {session.session_id}")
+    return SessionResponse(session_id=session.session_id, ttl_seconds=sessions.ttl_seconds)
+
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str, sessions: SessionStore = Depends(get_session_store)) -> Response:
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired.")
+    return Response(status_code=204)
+
+
+def _log_query(
+        query_log: QueryLog | None,
+        query: UserQuery,
+        started: float,
+        outcome: str,
+        sources: list[str] | None = None,
+        cache: str = "miss"
+) -> None:
+    if query_log is None:
+        return
+    latency_ms = (time.perf_counter() - started) * 1000
+    query_log.record(query.question, query.available_roles, latency_ms, sources or [], outcome, cache)
+
+
+async def _cancel_on_disconnect(request: Request, deadline: Deadline) -> None:
+    while not deadline.cancelled:
+        if await request.is_disconnected():
+            deadline.cancel()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
@@ -1,5 +1,10 @@
+import argparse
 import json
 import logging
+import shutil
+import subprocess
+import sys
+import time
 from pathlib import Path
 from typing import List
 
@@ -7,7 +12,11 @@ from tqdm import tqdm
 
 from application.config import settings
 from core.models.document import Document
-from infrastructure.db.chroma_db import ChromaDB
+from infrastructure.db.chroma_db import ChromaDB, hnsw_metadata
+from infrastructure.db.segments import (
+    PARTITION_HASH, PARTITION_ROLE, SegmentCheckpoint, assemble_shards, assign_shard, merge_segments, segment_name
+)
+from infrastructure.db.snapshots import CHROMA_DIR_NAME, CHUNK_STORE_FILE_NAME, KEYWORDS_FILE_NAME, SnapshotManager
 
 # Logger configuration
 logging.basicConfig(
@@ -16,6 +25,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+WORKER_POLL_INTERVAL_SECONDS = 1
+
 
 def load_documents(json_dir: Path) -> List[Document]:
     """Load and parse JSON documents from a given directory."""
@@ -34,36 +45,265 @@ def load_documents(json_dir: Path) -> List[Document]:
     return documents
 
 
-def main():
-    # Check if the source directory exists
-    json_dir = Path(settings.PARSED_DOCS_DIR)
-    if not json_dir.exists():
-        logger.error(f"Directory not found: {json_dir}")
-        return
+def build_snapshot(documents: List[Document], snapshots: SnapshotManager) -> str | None:
+    """Index documents into a new immutable snapshot. Returns its version."""
+    staging = snapshots.begin()
 
     # Initialize ChromaDB
     try:
-        db = ChromaDB()
-        logger.info(f"ChromaDB initialized at: {settings.CHROMADB_DIR}")
+        db = ChromaDB(
+            persist_dir=staging / CHROMA_DIR_NAME,
+            keywords_file=staging / KEYWORDS_FILE_NAME,
+            chunk_store_file=staging / CHUNK_STORE_FILE_NAME
+        )
+        logger.info(f"ChromaDB initialized at: {staging / CHROMA_DIR_NAME}")
     except Exception as e:
         logger.error(f"Failed to initialize ChromaDB: {e}")
-        return
-
-    # Load documents
-    documents = load_documents(json_dir)
-    if not documents:
-        logger.warning("No valid JSON documents found to index.")
-        return
+        return None
 
     # Index documents
     logger.info(f"Starting indexing of {len(documents)} documents...")
+    indexed = 0
     for doc in tqdm(documents, desc="Indexing documents"):
         try:
             db.add_documents([doc])
+            indexed += 1
+        except Exception as e:
+            logger.error(f"Failed to index document '{doc.title}': {e}")
+    chunks = db.collection.count()
+    db.close()
+
+    dedup = db.dedup_stats()
+    if dedup:
+        logger.info(
+            f"Near-duplicate detection collapsed {dedup['chunks_collapsed']} of {dedup['chunks_seen']} chunks "
+            f"({dedup['collapse_ratio']:.1%}, {dedup['chars_collapsed']} characters not embedded)."
+        )
+
+    return snapshots.commit(staging, {
+        "documents": indexed,
+        "chunks": chunks,
+        "dedup": dedup,
+        "hnsw": db.hnsw,
+    })
+
+
+def build_segment(
+        documents: List[Document],
+        shard: int,
+        shards: int,
+        segments_dir: Path,
+        partition: str = PARTITION_HASH,
+        fresh: bool = False
+) -> bool:
+    """
+    Index the documents of one shard into a self-contained segment, resuming from
+    its checkpoint. Returns True once the segment is complete. A segment with
+    failed documents is left incomplete, so the next run retries them.
+    """
+    segment_dir = segments_dir / segment_name(shard, shards)
+    if fresh and segment_dir.exists():
+        shutil.rmtree(segment_dir)
+    checkpoint = SegmentCheckpoint(segment_dir)
+    if checkpoint.is_complete():
+        logger.info(f"Segment {segment_dir.name} is already complete, nothing to do.")
+        return True
+
+    shard_docs = [doc for doc in documents if assign_shard(doc, shards, partition) == shard]
+    done = checkpoint.completed_sources()
+    pending = [doc for doc in shard_docs if doc.source_url not in done]
+    if done:
+        logger.info(f"Resuming segment {segment_dir.name}: {len(done)} of {len(shard_docs)} documents already indexed.")
+
+    try:
+        db = ChromaDB(
+            persist_dir=segment_dir / CHROMA_DIR_NAME,
+            keywords_file=segment_dir / KEYWORDS_FILE_NAME,
+            chunk_store_file=segment_dir / CHUNK_STORE_FILE_NAME
+        )
+    except Exception as e:
+        logger.error(f"Failed to initialize ChromaDB for segment {segment_dir.name}: {e}")
+        return False
+
+    failed = []
+    for doc in tqdm(pending, desc=f"Indexing {segment_dir.name}"):
+        try:
+            db.add_documents([doc])
+            checkpoint.mark_done(doc.source_url)
         except Exception as e:
             logger.error(f"Failed to index document '{doc.title}': {e}")
+            failed.append(doc.source_url)
+    chunks = db.collection.count()
+    db.close()
+
+    if failed:
+        logger.error(f"{len(failed)} document(s) of segment {segment_dir.name} failed; re-run to retry them.")
+        return False
+
+    checkpoint.complete({
+        "shard": shard,
+        "shards": shards,
+        "partition": partition,
+        "roles": sorted({doc.role for doc in shard_docs}),
+        "documents": len(shard_docs),
+        "chunks": chunks,
+        "dedup": db.dedup_stats(),
+        "hnsw": db.hnsw,
+    })
+    return True
+
+
+def run_workers(shards: int, segments_dir: Path, workers: int, partition: str, fresh: bool) -> bool:
+    """Build all segments with local worker processes. Returns True if every worker succeeded."""
+    pending = list(range(shards))
+    running = []
+    ok = True
+    while pending or running:
+        while pending and len(running) < workers:
+            shard = pending.pop(0)
+            command = [
+                sys.executable, str(Path(__file__).resolve()),
+                "--shards", str(shards), "--shard", str(shard), "--segments-dir", str(segments_dir),
+                "--partition", partition
+            ]
+            if fresh:
+                command.append("--fresh")
+            logger.info(f"Starting worker for shard {shard}/{shards}")
+            running.append((shard, subprocess.Popen(command)))
+
+        # Poll every worker, so a slot is refilled as soon as any of them exits.
+        still_running = []
+        for shard, process in running:
+            code = process.poll()
+            if code is None:
+                still_running.append((shard, process))
+            elif code != 0:
+                logger.error(f"Worker for shard {shard} exited with code {code}; re-run to resume it.")
+                ok = False
+            else:
+                logger.info(f"Worker for shard {shard}/{shards} finished")
+        if len(still_running) == len(running):
+            time.sleep(WORKER_POLL_INTERVAL_SECONDS)
+        running = still_running
+    return ok
+
 
-    logger.info("Indexing completed successfully.")
+def merge_snapshot(shards: int, segments_dir: Path, snapshots: SnapshotManager, keep_shards: bool = False) -> str | None:
+    """
+    Merge the segments of a sharded build into a new snapshot, or keep them as the
+    shards of a sharded snapshot searched with scatter-gather. Returns its version.
+    """
+    segment_dirs = [segments_dir / segment_name(shard, shards) for shard in range(shards)]
+    incomplete = [d.name for d in segment_dirs if not SegmentCheckpoint(d).is_complete()]
+    if incomplete:
+        logger.error(f"Cannot merge, incomplete segment(s): {incomplete}")
+        return None
+
+    staging = snapshots.begin()
+    hnsw = hnsw_metadata()
+    if keep_shards:
+        stats = assemble_shards(segment_dirs, staging)
+    else:
+        stats = merge_segments(segment_dirs, staging, hnsw)
+    version = snapshots.commit(staging, {**stats, "hnsw": hnsw})
+
+    # Segments belong to one build; the next sharded run starts from scratch.
+    for segment_dir in segment_dirs:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+    return version
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Index parsed documents into a new versioned snapshot.")
+    parser.add_argument("--no-publish", action="store_true",
+                        help="Build the snapshot without making it the one served by the API.")
+    parser.add_argument("--keep", type=int, default=settings.INDEX_SNAPSHOTS_KEEP,
+                        help="Number of published snapshots to keep for rollback.")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Partition the documents into this many independently built segments.")
+    parser.add_argument("--shard", type=int, default=None,
+                        help="Only build this segment (0-based), e.g. on one of several hosts.")
+    parser.add_argument("--merge", action="store_true",
+                        help="Merge the completed segments into a new snapshot without building any.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Local worker processes when building all shards (default: one per shard).")
+    parser.add_argument("--segments-dir", type=Path, default=settings.INDEX_SEGMENTS_DIR,
+                        help="Shared directory holding the segments.")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Discard existing segment progress instead of resuming.")
+    parser.add_argument("--partition", choices=[PARTITION_HASH, PARTITION_ROLE], default=PARTITION_HASH,
+                        help="Assign documents to shards by source URL hash or by role.")
+    parser.add_argument("--keep-shards", action="store_true",
+                        help="Serve the segments as shards of one snapshot instead of merging them.")
+    parser.add_argument("--precompute", action="store_true",
+                        help="Refresh precomputed answers for hot questions after publishing.")
+    args = parser.parse_args()
+
+    if (args.shard is not None or args.merge) and not args.shards:
+        parser.error("--shard and --merge require --shards")
+    if args.shard is not None and not 0 <= args.shard < args.shards:
+        parser.error("--shard must be between 0 and --shards - 1")
+    return args
+
+
+def publish(snapshots: SnapshotManager, version: str, args: argparse.Namespace) -> None:
+    if args.no_publish:
+        logger.info(f"Snapshot {version} was not published. Activate it via /api/admin/index/activate/{version}.")
+        return
+
+    # A running API picks the new snapshot up through its watcher or /api/admin/index/reload.
+    snapshots.publish(version)
+    snapshots.garbage_collect(keep=args.keep)
+
+    if args.precompute:
+        # Answers citing articles that changed are stale from now on; regenerate them for the new index.
+        logger.info("Refreshing precomputed answers...")
+        subprocess.run([sys.executable, str(Path(__file__).resolve().parent / "precompute_answers.py")], check=False)
+
+
+def main():
+    args = parse_args()
+    snapshots = SnapshotManager()
+
+    if args.merge:
+        version = merge_snapshot(args.shards, args.segments_dir, snapshots, args.keep_shards)
+        if version:
+            logger.info(f"Merge completed successfully. Snapshot: {version}")
+            publish(snapshots, version, args)
+        return
+
+    if args.shards and args.shard is None:
+        if not run_workers(args.shards, args.segments_dir, args.workers or args.shards, args.partition, args.fresh):
+            sys.exit(1)
+        version = merge_snapshot(args.shards, args.segments_dir, snapshots, args.keep_shards)
+        if version:
+            logger.info(f"Indexing completed successfully. Snapshot: {version}")
+            publish(snapshots, version, args)
+        return
+
+    # Check if the source directory exists
+    json_dir = Path(settings.PARSED_DOCS_DIR)
+    if not json_dir.exists():
+        logger.error(f"Directory not found: {json_dir}")
+        return
+
+    # Load documents
+    documents = load_documents(json_dir)
+    if not documents:
+        logger.warning("No valid JSON documents found to index.")
+        return
+
+    if args.shards:
+        # A single worker of a sharded build; the merge runs separately.
+        if not build_segment(documents, args.shard, args.shards, args.segments_dir, args.partition, args.fresh):
+            sys.exit(1)
+        return
+
+    version = build_snapshot(documents, snapshots)
+    if version is None:
+        return
+    logger.info(f"Indexing completed successfully. Snapshot: {version}")
+    publish(snapshots, version, args)
 
 
 if __name__ == "__main__":
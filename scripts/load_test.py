@@ -0,0 +1,283 @@
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+# Logger configuration
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUESTIONS = [
+    "how to manage users in Confluence data center",
+    "how do I configure Confluence security",
+    "what are space permissions",
+    "how to write a user macro",
+    "how to restrict access to a page",
+]
+
+
+class RunStats:
+    """Thread-safe collection of per-request outcomes and sampled queue depths."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies_ms: Dict[str, List[float]] = {}  # per outcome
+        self.outcomes: Dict[str, int] = {}
+        self.queue_samples: Dict[str, List[float]] = {}
+
+    def record(self, outcome: str, latency_ms: float | None = None) -> None:
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if latency_ms is not None:
+                self.latencies_ms.setdefault(outcome, []).append(latency_ms)
+
+    def sample(self, name: str, value: float) -> None:
+        with self._lock:
+            self.queue_samples.setdefault(name, []).append(value)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": round(sum(values) / len(values), 1) if values else 0.0,
+        "p50": round(percentile(values, 50), 1),
+        "p90": round(percentile(values, 90), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+        "max": round(max(values), 1) if values else 0.0,
+    }
+
+
+def send_question(
+        session: requests.Session,
+        args: argparse.Namespace,
+        question: str,
+        stats: RunStats,
+        scheduled_at: float | None = None
+) -> None:
+    payload = {"question": question, "available_roles": args.roles}
+    # In open-loop mode latency counts from the scheduled arrival, including any client-side
+    # wait for a free worker, so a saturated server isn't hidden (coordinated omission).
+    started = scheduled_at or time.perf_counter()
+    try:
+        response = session.post(f"{args.url}/api/ask", json=payload, timeout=args.timeout)
+    except requests.exceptions.Timeout:
+        # The true latency is at least this long; dropping it would hide the tail.
+        stats.record("client_timeout", (time.perf_counter() - started) * 1000)
+        return
+    except requests.exceptions.RequestException as e:
+        logger.debug(f"Request failed: {e}")
+        stats.record("connection_error")
+        return
+
+    latency_ms = (time.perf_counter() - started) * 1000
+    if response.status_code == 504:
+        stats.record("server_timeout", latency_ms)
+    elif response.status_code != 200:
+        stats.record(f"http_{response.status_code}", latency_ms)
+    elif response.json().get("is_complete"):
+        stats.record("complete", latency_ms)
+    else:
+        stats.record("retrieval_only", latency_ms)
+
+
+def sample_queues(args: argparse.Namespace, stats: RunStats, stop: threading.Event) -> None:
+    while not stop.wait(args.sample_interval):
+        try:
+            gauges = requests.get(f"{args.url}/metrics", timeout=2).json().get("gauges", {})
+            stats.sample("app_llm_queue_depth", gauges.get("llm_queue_depth", 0))
+        except requests.exceptions.RequestException:
+            pass
+        if args.stub_url:
+            try:
+                stub = requests.get(f"{args.stub_url}/stub/stats", timeout=2).json()
+                stats.sample("stub_queued", stub.get("queued", 0))
+                stats.sample("stub_active", stub.get("active", 0))
+            except requests.exceptions.RequestException:
+                pass
+
+
+def next_question(args: argparse.Namespace, questions: List[str], i: int) -> str:
+    question = random.choice(questions)
+    # Distinct questions defeat request coalescing when measuring raw LLM capacity.
+    return f"{question} (#{i})" if args.distinct else question
+
+
+def run_closed_loop(args: argparse.Namespace, questions: List[str], stats: RunStats) -> None:
+    """`concurrency` users, each sending its next question as soon as the previous one returns."""
+    deadline = time.monotonic() + args.duration
+    counter = iter(range(10 ** 9))
+    counter_lock = threading.Lock()
+
+    def user():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            with counter_lock:
+                i = next(counter)
+            if args.requests and i >= args.requests:
+                return
+            send_question(session, args, next_question(args, questions, i), stats)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for _ in range(args.concurrency):
+            pool.submit(user)
+
+
+def run_open_loop(args: argparse.Namespace, questions: List[str], stats: RunStats) -> None:
+    """Poisson arrivals at `rate` req/s, independent of how fast the server answers."""
+    deadline = time.monotonic() + args.duration
+    local = threading.local()
+
+    def fire(i: int, scheduled_at: float):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        send_question(local.session, args, next_question(args, questions, i), stats, scheduled_at)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        i = 0
+        while time.monotonic() < deadline and (not args.requests or i < args.requests):
+            pool.submit(fire, i, time.perf_counter())
+            i += 1
+            time.sleep(random.expovariate(args.rate))
+
+
+def build_report(args: argparse.Namespace, stats: RunStats, elapsed: float, metrics_before: Dict, metrics_after: Dict) -> Dict:
+    total = sum(stats.outcomes.values())
+    answered = stats.outcomes.get("complete", 0) + stats.outcomes.get("retrieval_only", 0)
+    timeouts = stats.outcomes.get("client_timeout", 0) + stats.outcomes.get("server_timeout", 0)
+    errors = total - answered - timeouts
+    latencies = [latency for values in stats.latencies_ms.values() for latency in values]
+    answered_latencies = stats.latencies_ms.get("complete", []) + stats.latencies_ms.get("retrieval_only", [])
+
+    counters_before = metrics_before.get("counters", {})
+    counters_delta = {
+        name: value - counters_before.get(name, 0)
+        for name, value in metrics_after.get("counters", {}).items()
+        if value - counters_before.get(name, 0)
+    }
+
+    return {
+        "config": {
+            "url": args.url,
+            "mode": "open" if args.rate else "closed",
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "duration_s": args.duration,
+            "distinct": args.distinct,
+            "roles": args.roles,
+        },
+        "requests": total,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(answered / elapsed, 3) if elapsed else 0.0,
+        # Client timeouts count at the time waited (a lower bound of their latency).
+        "latency_ms": latency_summary(latencies),
+        "latency_ms_answered": latency_summary(answered_latencies),
+        "outcomes": stats.outcomes,
+        "rates": {
+            "complete": round(stats.outcomes.get("complete", 0) / total, 4) if total else 0.0,
+            "retrieval_only": round(stats.outcomes.get("retrieval_only", 0) / total, 4) if total else 0.0,
+            "timeout": round(timeouts / total, 4) if total else 0.0,
+            "error": round(errors / total, 4) if total else 0.0,
+        },
+        "queue_depth": {
+            name: {"mean": round(sum(values) / len(values), 2), "max": max(values)}
+            for name, values in stats.queue_samples.items() if values
+        },
+        "server_counters": counters_delta,
+    }
+
+
+def fetch_metrics(url: str) -> Dict:
+    try:
+        return requests.get(f"{url}/metrics", timeout=5).json()
+    except requests.exceptions.RequestException:
+        return {}
+
+
+def print_comparison(report: Dict, baseline: Dict) -> None:
+    rows = [
+        ("throughput_rps", report["throughput_rps"], baseline.get("throughput_rps", 0)),
+        *[(f"latency_ms.{p}", report["latency_ms"][p], baseline.get("latency_ms", {}).get(p, 0))
+          for p in ("p50", "p95", "p99")],
+        *[(f"rates.{r}", report["rates"][r], baseline.get("rates", {}).get(r, 0))
+          for r in ("complete", "timeout", "error")],
+    ]
+    logger.info("Comparison with baseline:")
+    for name, current, previous in rows:
+        change = f"{(current - previous) / previous:+.1%}" if previous else "n/a"
+        logger.info(f"  {name:<22} {previous:>10} -> {current:>10}  ({change})")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the /api/ask endpoint.")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the DocThink API.")
+    parser.add_argument("--stub-url", default=None, help="Base URL of scripts/localai_stub.py for queue sampling.")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="Concurrent users (closed loop) or max in-flight requests (open loop).")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Open-loop arrival rate in requests/second. Closed loop when omitted.")
+    parser.add_argument("--duration", type=float, default=60, help="Test duration in seconds.")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests.")
+    parser.add_argument("--timeout", type=float, default=180, help="Client-side timeout per request in seconds.")
+    parser.add_argument("--questions", type=Path, default=None, help="File with one question per line.")
+    parser.add_argument("--roles", nargs="+", default=["admin", "developer", "jurist"])
+    parser.add_argument("--distinct", action="store_true", help="Make every question unique (no coalescing).")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Queue-depth sampling interval.")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous JSON report to compare against.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        questions = [line.strip() for line in args.questions.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    stats = RunStats()
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_queues, args=(args, stats, stop), daemon=True)
+
+    metrics_before = fetch_metrics(args.url)
+    logger.info(f"Starting {'open' if args.rate else 'closed'}-loop load test against {args.url} "
+                f"(concurrency={args.concurrency}, rate={args.rate}, duration={args.duration}s)")
+    started = time.perf_counter()
+    sampler.start()
+    if args.rate:
+        run_open_loop(args, questions, stats)
+    else:
+        run_closed_loop(args, questions, stats)
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    report = build_report(args, stats, elapsed, metrics_before, fetch_metrics(args.url))
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        logger.info(f"Report written to {args.output}")
+    if args.baseline:
+        print_comparison(report, json.loads(args.baseline.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
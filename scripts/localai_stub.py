@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from application.config import settings
+from application.use_cases.utils import count_tokens
+
+# Logger configuration
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+FILLER_WORDS = ["the", "page", "describes", "how", "to", "configure", "users", "and", "permissions", "in", "Confluence"]
+
+
+class SimulatedModel:
+    """
+    Simulates a CPU-hosted LLM behind an OpenAI-compatible API: requests wait
+    for one of `parallel` slots, spend prompt_tokens / prefill_tps seconds on
+    prefill and then emit tokens at decode_tps.
+    """
+
+    def __init__(self, prefill_tps: float, decode_tps: float, parallel: int, response_tokens: int, jitter: float):
+        self.prefill_tps = prefill_tps
+        self.decode_tps = decode_tps
+        self.response_tokens = response_tokens
+        self.jitter = jitter
+        self.slots = asyncio.Semaphore(parallel)
+        self.stats = {"queued": 0, "active": 0, "completed": 0, "cancelled": 0, "max_queued": 0}
+
+    def completion_tokens(self, max_tokens: int) -> int:
+        tokens = int(self.response_tokens * random.uniform(1 - self.jitter, 1 + self.jitter))
+        return max(1, min(max_tokens, tokens))
+
+    async def generate(self, prompt_tokens: int, completion_tokens: int):
+        """Yield generated tokens one by one, holding a slot for the whole generation."""
+        self.stats["queued"] += 1
+        self.stats["max_queued"] = max(self.stats["max_queued"], self.stats["queued"])
+        waiting = True
+        try:
+            async with self.slots:
+                self.stats["queued"] -= 1
+                waiting = False
+                self.stats["active"] += 1
+                try:
+                    await asyncio.sleep(prompt_tokens / self.prefill_tps)
+                    for i in range(completion_tokens):
+                        await asyncio.sleep(1 / self.decode_tps)
+                        yield FILLER_WORDS[i % len(FILLER_WORDS)] + " "
+                    self.stats["completed"] += 1
+                finally:
+                    self.stats["active"] -= 1
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client went away; the slot is released so the next request can start.
+            self.stats["cancelled"] += 1
+            raise
+        finally:
+            if waiting:
+                self.stats["queued"] -= 1
+
+
+def create_app(model: SimulatedModel) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": settings.LLM_MODEL, "object": "model"}]}
+
+    @app.get("/stub/stats")
+    async def get_stats():
+        return model.stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        prompt_tokens = count_tokens(prompt, settings.LLM_MODEL)
+        completion_tokens = model.completion_tokens(body.get("max_tokens", 512))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        if body.get("stream"):
+            async def event_stream():
+                async for token in model.generate(prompt_tokens, completion_tokens):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        text = "".join([token async for token in model.generate(prompt_tokens, completion_tokens)])
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    return app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub that simulates LocalAI timing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8083)
+    parser.add_argument("--prefill-tps", type=float, default=80.0, help="Prompt tokens processed per second.")
+    parser.add_argument("--decode-tps", type=float, default=8.0, help="Completion tokens generated per second.")
+    parser.add_argument("--parallel", type=int, default=1, help="Requests processed concurrently.")
+    parser.add_argument("--response-tokens", type=int, default=150, help="Mean completion length in tokens.")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Relative spread of the completion length.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    simulated_model = SimulatedModel(args.prefill_tps, args.decode_tps, args.parallel, args.response_tokens, args.jitter)
+    logger.info(
+        f"Starting LocalAI stub on {args.host}:{args.port} "
+        f"(prefill {args.prefill_tps} tok/s, decode {args.decode_tps} tok/s, parallel {args.parallel})"
+    )
+    uvicorn.run(create_app(simulated_model), host=args.host, port=args.port)
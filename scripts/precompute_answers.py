@@ -0,0 +1,176 @@
+import argparse
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from application.config import settings
+from application.services.deadline import Deadline, DeadlineExceeded
+from application.services.llm_orchestrator import LLMOrchestrator
+from application.services.precomputed_answers import PrecomputedAnswers, article_fingerprint
+from application.services.prompt_compressor import PromptCompressor
+from application.services.query_log import QueryLog
+from application.use_cases.rag import RAGUseCase
+from core.models.precomputed import PrecomputedAnswer
+from core.models.user_query import UserQuery
+from infrastructure.db.index_registry import IndexRegistry
+from infrastructure.db.snapshots import SnapshotManager
+from infrastructure.llm.localai_mistral import LocalAIMistral
+
+# Logger configuration
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def count_questions(query_log: QueryLog, since: float) -> Dict[Tuple[str, ...], Counter]:
+    """Logged question counts per role set."""
+    counts: Dict[Tuple[str, ...], Counter] = {}
+    for entry in query_log.read(since):
+        # Follow-ups ("and for admins?") only make sense within their conversation.
+        if entry.get("cache") == "session" or not entry.get("q"):
+            continue
+        counts.setdefault(tuple(entry.get("roles", [])), Counter())[entry["q"]] += 1
+    return counts
+
+
+def cluster_questions(embeddings: np.ndarray, max_distance: float) -> List[List[int]]:
+    """
+    Greedy leader clustering of normalized embeddings, given in descending order of
+    frequency: each question joins the nearest cluster leader within `max_distance`,
+    or leads a new cluster.
+    """
+    clusters: List[List[int]] = []
+    leaders = np.empty((0, embeddings.shape[1]), dtype=np.float32)
+    for i, embedding in enumerate(embeddings):
+        if len(clusters):
+            distances = 1.0 - leaders @ embedding
+            best = int(np.argmin(distances))
+            if distances[best] <= max_distance:
+                clusters[best].append(i)
+                continue
+        clusters.append([i])
+        leaders = np.vstack([leaders, embedding])
+    return clusters
+
+
+def hot_clusters(
+        counter: Counter,
+        embed_texts,
+        max_distance: float,
+        min_count: int,
+        top: int
+) -> List[Dict]:
+    questions = [q for q, _ in counter.most_common()]
+    embeddings = np.asarray(embed_texts(questions), dtype=np.float32)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    clusters = []
+    for members in cluster_questions(embeddings, max_distance):
+        weights = np.asarray([counter[questions[i]] for i in members], dtype=np.float32)
+        centroid = (embeddings[members] * weights[:, None]).sum(axis=0)
+        clusters.append({
+            "question": questions[members[0]],  # the most frequent member leads the cluster
+            "questions": [questions[i] for i in members],
+            "centroid": (centroid / max(float(np.linalg.norm(centroid)), 1e-12)).tolist(),
+            "hits": int(weights.sum()),
+        })
+
+    clusters = [c for c in clusters if c["hits"] >= min_count]
+    clusters.sort(key=lambda c: c["hits"], reverse=True)
+    return clusters[:top]
+
+
+def fingerprints(db, sources: List[str]) -> Dict[str, str]:
+    return {source: article_fingerprint(db.get_article_chunks(source)) for source in sources}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Precompute answers for the most frequent logged questions.")
+    parser.add_argument("--since-days", type=float, default=14, help="Only mine questions logged this recently.")
+    parser.add_argument("--top", type=int, default=20, help="Hot clusters to answer per role set.")
+    parser.add_argument("--min-count", type=int, default=3, help="Minimum requests for a cluster to be hot.")
+    parser.add_argument("--cluster-distance", type=float, default=0.15,
+                        help="Max cosine distance between questions of one cluster.")
+    parser.add_argument("--deadline", type=float, default=settings.LLM_TIMEOUT_SECONDS,
+                        help="Time budget per generated answer in seconds.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    counts = count_questions(QueryLog(), time.time() - args.since_days * 24 * 60 * 60)
+    if not counts:
+        logger.warning(f"No questions found in {settings.QUERY_LOG_FILE}.")
+        return
+
+    registry = IndexRegistry(SnapshotManager())
+    handle = registry.current()
+    use_case = RAGUseCase(
+        registry,
+        LLMOrchestrator(LocalAIMistral(base_url=settings.LOCALAI_URL, model=settings.LLM_MODEL)),
+        prompt_compressor=PromptCompressor() if settings.PROMPT_COMPRESSION_ENABLED else None
+    )
+    logger.info(f"Precomputing answers against index version {handle.version}")
+
+    # Answers whose cited articles didn't change in this reindex are kept without calling the LLM.
+    previous = {
+        (tuple(entry.roles), entry.question): entry
+        for entry in PrecomputedAnswers.load(settings.PRECOMPUTED_ANSWERS_FILE)
+    } if settings.PRECOMPUTED_ANSWERS_FILE.exists() else {}
+
+    entries: List[PrecomputedAnswer] = []
+    generated = reused = 0
+    for roles, counter in counts.items():
+        clusters = hot_clusters(counter, handle.db.embed_texts, args.cluster_distance, args.min_count, args.top)
+        logger.info(f"Roles {list(roles)}: {len(clusters)} hot cluster(s) from {len(counter)} distinct question(s)")
+
+        for cluster in clusters:
+            old = previous.get((roles, cluster["question"]))
+            if old is not None and fingerprints(handle.db, list(old.fingerprints)) == old.fingerprints:
+                answer, sources, source_fingerprints = old.answer, old.sources, old.fingerprints
+                created_at = old.created_at
+                reused += 1
+            else:
+                try:
+                    result = use_case.execute(
+                        UserQuery(question=cluster["question"], available_roles=list(roles)),
+                        Deadline(args.deadline)
+                    )
+                except DeadlineExceeded:
+                    logger.warning(f"Timed out answering {cluster['question']!r}, skipping.")
+                    continue
+                if not result["is_complete"] or result.get("degraded"):
+                    logger.warning(
+                        f"No complete answer for {cluster['question']!r} "
+                        f"({result.get('degraded', 'no relevant article')}), skipping."
+                    )
+                    continue
+                answer, sources = result["answer"], result["sources"]
+                source_fingerprints = fingerprints(handle.db, sources)
+                created_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                generated += 1
+
+            entries.append(PrecomputedAnswer(
+                roles=list(roles),
+                answer=answer,
+                sources=sources,
+                fingerprints=source_fingerprints,
+                index_version=handle.version,
+                created_at=created_at,
+                **cluster
+            ))
+
+    PrecomputedAnswers.save(settings.PRECOMPUTED_ANSWERS_FILE, entries)
+    logger.info(
+        f"Wrote {len(entries)} precomputed answer(s) to {settings.PRECOMPUTED_ANSWERS_FILE} "
+        f"({generated} generated, {reused} reused)."
+    )
+
+
+if __name__ == "__main__":
+    main()
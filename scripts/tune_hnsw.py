@@ -0,0 +1,272 @@
+import argparse
+import itertools
+import json
+import logging
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Set
+
+import chromadb
+import numpy as np
+
+from application.config import settings
+from infrastructure.db.chroma_db import COLLECTION_NAME, hnsw_metadata
+from infrastructure.db.snapshots import CHROMA_DIR_NAME, SnapshotManager
+
+# Logger configuration
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+TITLE_SECTION = "Document Title"
+
+
+def load_corpus(chroma_dir: Path) -> Dict:
+    """Read ids, embeddings and metadata of the served index."""
+    client = chromadb.PersistentClient(path=str(chroma_dir))
+    collection = client.get_collection(COLLECTION_NAME)
+
+    ids, embeddings, metadatas = [], [], []
+    for offset in range(0, collection.count(), PAGE_SIZE):
+        page = collection.get(include=["embeddings", "metadatas"], limit=PAGE_SIZE, offset=offset)
+        ids.extend(page["ids"])
+        embeddings.extend(page["embeddings"])
+        metadatas.extend(page["metadatas"])
+
+    logger.info(f"Loaded {len(ids)} vectors from '{chroma_dir}'")
+    return {"ids": ids, "embeddings": np.asarray(embeddings, dtype=np.float32), "metadatas": metadatas}
+
+
+def select_queries(corpus: Dict, limit: int) -> List[int]:
+    """
+    Use article title chunks as queries: each one has a known relevant article
+    (its own source), which is what the distance threshold is calibrated against.
+    """
+    title_rows = [i for i, meta in enumerate(corpus["metadatas"]) if meta.get("section") == TITLE_SECTION]
+    random.shuffle(title_rows)
+    return title_rows[:limit]
+
+
+def exact_distances(space: str, queries: np.ndarray, corpus: np.ndarray) -> np.ndarray:
+    """Brute-force distances in the same units Chroma reports for `space`."""
+    if space == "l2":
+        return (
+            np.sum(queries ** 2, axis=1)[:, None]
+            - 2 * queries @ corpus.T
+            + np.sum(corpus ** 2, axis=1)[None, :]
+        )
+    if space == "cosine":
+        q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        c = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        return 1 - q @ c.T
+    if space == "ip":
+        return 1 - queries @ corpus.T
+    raise ValueError(f"Unknown HNSW space '{space}'")
+
+
+def exact_top_k(distances: np.ndarray, query_rows: List[int], k: int) -> List[List[int]]:
+    result = []
+    for qi, row in enumerate(query_rows):
+        d = distances[qi].copy()
+        d[row] = np.inf  # the query's own chunk is not a neighbour
+        result.append(list(np.argsort(d)[:k]))
+    return result
+
+
+def same_article_rows(corpus: Dict, query_rows: List[int]) -> List[Set[int]]:
+    """Rows of each query's own article (except the query itself): the relevance labels shared by all spaces."""
+    rows_by_source: Dict[str, Set[int]] = {}
+    for i, meta in enumerate(corpus["metadatas"]):
+        rows_by_source.setdefault(meta.get("source"), set()).add(i)
+    return [rows_by_source[corpus["metadatas"][row].get("source")] - {row} for row in query_rows]
+
+
+def relevance_at_k(found: List[List[int]], relevant: List[Set[int]], k: int) -> float:
+    """Share of the reachable same-article chunks among the top k, averaged over queries that have any."""
+    scores = [
+        len(set(int(i) for i in rows) & labels) / min(k, len(labels))
+        for rows, labels in zip(found, relevant) if labels
+    ]
+    return round(float(np.mean(scores)), 4) if scores else 0.0
+
+
+def evaluate(corpus: Dict, query_rows: List[int], space: str, m: int, construction_ef: int, search_ef: int,
+             truth: List[List[int]], relevant: List[Set[int]], k: int) -> Dict:
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(
+        f"tune_{uuid.uuid4().hex}",
+        metadata=hnsw_metadata(space, m, construction_ef, search_ef)
+    )
+
+    started = time.perf_counter()
+    for offset in range(0, len(corpus["ids"]), PAGE_SIZE):
+        collection.add(
+            ids=[str(i) for i in range(offset, min(offset + PAGE_SIZE, len(corpus["ids"])))],
+            embeddings=corpus["embeddings"][offset:offset + PAGE_SIZE].tolist(),
+        )
+    build_s = time.perf_counter() - started
+
+    latencies_ms, recalls, found_rows = [], [], []
+    for row, expected in zip(query_rows, truth):
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[corpus["embeddings"][row].tolist()], n_results=k + 1)
+        latencies_ms.append((time.perf_counter() - started) * 1000)
+
+        found = [int(i) for i in result["ids"][0] if int(i) != row][:k]
+        recalls.append(len(set(found) & set(int(e) for e in expected)) / k)
+        found_rows.append(found)
+
+    client.delete_collection(collection.name)
+    return {
+        "space": space,
+        "M": m,
+        "construction_ef": construction_ef,
+        "search_ef": search_ef,
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+        "relevance_at_k": relevance_at_k(found_rows, relevant, k),
+        "latency_ms_p50": round(float(np.percentile(latencies_ms, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(latencies_ms, 95)), 3),
+        "build_s": round(build_s, 2),
+    }
+
+
+def calibrate_threshold(corpus: Dict, query_rows: List[int], distances: np.ndarray, pool: int) -> Dict:
+    """
+    Pick the distance threshold that best separates chunks of the query's own article
+    from other articles among the `pool` nearest candidates (the window search filters).
+    """
+    sources = [meta.get("source") for meta in corpus["metadatas"]]
+    scored = []
+    for qi, row in enumerate(query_rows):
+        d = distances[qi].copy()
+        d[row] = np.inf
+        for candidate in np.argsort(d)[:pool]:
+            scored.append((float(d[candidate]), sources[candidate] == sources[row]))
+
+    positives = sum(1 for _, relevant in scored if relevant)
+    if not positives:
+        return {}
+
+    best = {"f1": -1.0}
+    scored.sort()
+    kept_relevant = 0
+    for kept, (distance, relevant) in enumerate(scored, start=1):
+        kept_relevant += relevant
+        precision = kept_relevant / kept
+        recall = kept_relevant / positives
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        if f1 > best["f1"]:
+            best = {
+                "threshold": round(distance, 4),
+                "precision": round(precision, 4),
+                "recall": round(recall, 4),
+                "f1": round(f1, 4),
+            }
+    return best
+
+
+def choose_space(spaces: Dict[str, Dict]) -> str:
+    """
+    The space whose exact search ranks the query's own article highest. Recall is
+    only comparable within a space (each is measured against that space's own exact
+    search), so spaces are compared on the shared same-article labels instead.
+    Ties, e.g. on normalized embeddings where all spaces rank alike, keep HNSW_SPACE.
+    """
+    return max(spaces, key=lambda space: (spaces[space]["relevance_at_k"], space == settings.HNSW_SPACE))
+
+
+def recommend(results: List[Dict], target_recall: float) -> Dict:
+    """Fastest configuration reaching `target_recall`, among results of a single space."""
+    eligible = [r for r in results if r["recall_at_k"] >= target_recall]
+    if not eligible:
+        logger.warning(f"No configuration reached recall {target_recall}; recommending the most accurate one.")
+        return max(results, key=lambda r: (r["recall_at_k"], -r["latency_ms_p95"]))
+    return min(eligible, key=lambda r: (r["latency_ms_p95"], r["M"], r["construction_ef"]))
+
+
+def resolve_chroma_dir(args: argparse.Namespace) -> Path:
+    if args.chroma_dir:
+        return args.chroma_dir
+    snapshots = SnapshotManager()
+    version = snapshots.current_version()
+    if version:
+        return snapshots.path(version) / CHROMA_DIR_NAME
+    return settings.CHROMADB_DIR
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Grid-search HNSW parameters and calibrate DISTANCE_THRESHOLD.")
+    parser.add_argument("--chroma-dir", type=Path, default=None,
+                        help="Index to tune (default: the published snapshot, else the legacy index).")
+    parser.add_argument("--spaces", nargs="+", default=["l2", "cosine", "ip"])
+    parser.add_argument("--m", nargs="+", type=int, default=[8, 16, 32])
+    parser.add_argument("--construction-ef", nargs="+", type=int, default=[100, 200])
+    parser.add_argument("--search-ef", nargs="+", type=int, default=[10, 50, 100])
+    parser.add_argument("--k", type=int, default=15, help="Neighbours per query (search uses top_k * 5).")
+    parser.add_argument("--queries", type=int, default=200, help="Max number of title queries.")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report to this file.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    corpus = load_corpus(resolve_chroma_dir(args))
+    query_rows = select_queries(corpus, args.queries)
+    if not query_rows:
+        logger.error("No title chunks found to use as queries.")
+        return
+    queries = corpus["embeddings"][query_rows]
+    logger.info(f"Using {len(query_rows)} queries, recall@{args.k} against exact search.")
+    relevant = same_article_rows(corpus, query_rows)
+
+    results, spaces = [], {}
+    for space in args.spaces:
+        distances = exact_distances(space, queries, corpus["embeddings"])
+        truth = exact_top_k(distances, query_rows, args.k)
+        spaces[space] = {
+            "relevance_at_k": relevance_at_k(truth, relevant, args.k),
+            "threshold": calibrate_threshold(corpus, query_rows, distances, args.k),
+        }
+        logger.info(f"Space {space}: exact search relevance@{args.k} {spaces[space]['relevance_at_k']}")
+
+        for m, construction_ef, search_ef in itertools.product(args.m, args.construction_ef, args.search_ef):
+            result = evaluate(corpus, query_rows, space, m, construction_ef, search_ef, truth, relevant, args.k)
+            logger.info(json.dumps(result))
+            results.append(result)
+
+    space = choose_space(spaces)
+    best = recommend([r for r in results if r["space"] == space], args.target_recall)
+    report = {
+        "vectors": len(corpus["ids"]),
+        "queries": len(query_rows),
+        "k": args.k,
+        "target_recall": args.target_recall,
+        "results": results,
+        "spaces": spaces,
+        "recommended": {
+            "HNSW_SPACE": best["space"],
+            "HNSW_M": best["M"],
+            "HNSW_CONSTRUCTION_EF": best["construction_ef"],
+            "HNSW_SEARCH_EF": best["search_ef"],
+            "DISTANCE_THRESHOLD": spaces[space]["threshold"].get("threshold"),
+            "expected": best,
+        },
+    }
+    print(json.dumps(report["recommended"], indent=2))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
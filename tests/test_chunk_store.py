@@ -0,0 +1,34 @@
+import sqlite3
+
+import pytest
+
+from core.models.document import StoredChunk
+from infrastructure.db.chunk_store import ChunkStore
+
+CHUNKS = [
+    StoredChunk(content="VPN access", section_title="Document Title", order=0, token_count=3),
+    StoredChunk(content="Open a ticket in the IT portal.", section_title="Steps", order=1, token_count=9),
+]
+
+
+def test_read_only_store_serves_an_existing_file(tmp_path):
+    path = tmp_path / "snapshot" / "chunks.sqlite"
+    writer = ChunkStore(path)
+    writer.add_article("https://wiki/vpn", CHUNKS)
+    writer.close()
+
+    reader = ChunkStore(path, read_only=True)
+
+    assert reader.get_article("https://wiki/vpn") == CHUNKS
+    with pytest.raises(sqlite3.OperationalError):
+        reader.add_article("https://wiki/other", CHUNKS)
+    reader.close()
+
+
+def test_read_only_store_never_creates_the_file(tmp_path):
+    path = tmp_path / "snapshot" / "chunks.sqlite"
+
+    with pytest.raises(sqlite3.OperationalError):
+        ChunkStore(path, read_only=True)
+
+    assert not path.parent.exists()
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from application.config import settings
+from application.services.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from application.services.llm_orchestrator import LLMOrchestrator
+from core.models.llm import ChatMessage, LLMRequest, LLMResponse
+from infrastructure.llm.abstract_llm import ILLMService, LLMServiceError
+
+
+class BlockingLLM(ILLMService):
+    """Fake LLM whose calls block until released, honouring the deadline like LocalAIMistral."""
+
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def chat_completion(self, request: LLMRequest, deadline: Deadline | None = None) -> LLMResponse:
+        self.calls += 1
+        self.started.set()
+        while not self.release.wait(timeout=0.01):
+            deadline.check()
+        if self.error is not None:
+            raise self.error
+        return LLMResponse(text="answer", tokens_used=1, is_truncated=False)
+
+
+class Caller(threading.Thread):
+    def __init__(self, orchestrator: LLMOrchestrator, deadline: Deadline):
+        super().__init__(daemon=True)
+        self.orchestrator = orchestrator
+        self.deadline = deadline
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+    def run(self):
+        request = LLMRequest(messages=[ChatMessage(role="user", content="how to restrict a page")])
+        try:
+            self.result = self.orchestrator.get_chat_completion(request, self.deadline)
+        except Exception as e:
+            self.error = e
+        self.finished_at = time.monotonic()
+
+
+@pytest.fixture(autouse=True)
+def llm_settings(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_COALESCE_REQUESTS", True)
+    monkeypatch.setattr(settings, "LLM_MIN_BUDGET_SECONDS", 0)
+    monkeypatch.setattr(settings, "LLM_MAX_QUEUE_DEPTH", 8)
+
+
+def start_leader_and_follower(llm, leader_deadline, follower_deadline):
+    orchestrator = LLMOrchestrator(llm)
+    leader = Caller(orchestrator, leader_deadline)
+    leader.start()
+    assert llm.started.wait(timeout=2)
+    follower = Caller(orchestrator, follower_deadline)
+    follower.start()
+    time.sleep(0.1)  # let the follower join the flight
+    return leader, follower
+
+
+def test_cancelled_leader_returns_at_once_and_follower_gets_the_result():
+    llm = BlockingLLM()
+    leader_deadline = Deadline(30)
+    leader, follower = start_leader_and_follower(llm, leader_deadline, Deadline(30))
+
+    leader_deadline.cancel()
+    leader.join(timeout=1)
+    assert not leader.is_alive()
+    assert isinstance(leader.error, RequestCancelled)
+
+    llm.release.set()
+    follower.join(timeout=2)
+    assert follower.result == "answer"
+    assert llm.calls == 1
+
+
+def test_expired_leader_raises_while_follower_keeps_waiting():
+    llm = BlockingLLM()
+    leader, follower = start_leader_and_follower(llm, Deadline(0.3), Deadline(30))
+
+    leader.join(timeout=2)
+    assert isinstance(leader.error, DeadlineExceeded)
+    assert follower.is_alive()
+
+    llm.release.set()
+    follower.join(timeout=2)
+    assert follower.result == "answer"
+    assert leader.finished_at < follower.finished_at
+    assert llm.calls == 1
+
+
+def test_upstream_error_reaches_every_waiter():
+    llm = BlockingLLM(error=LLMServiceError("LocalAI is down"))
+    orchestrator = LLMOrchestrator(llm)
+    callers = [Caller(orchestrator, Deadline(30)) for _ in range(3)]
+    callers[0].start()
+    assert llm.started.wait(timeout=2)
+    for caller in callers[1:]:
+        caller.start()
+    time.sleep(0.1)
+
+    llm.release.set()
+    for caller in callers:
+        caller.join(timeout=2)
+        assert isinstance(caller.error, LLMServiceError)
+    assert llm.calls == 1
+
+
+def test_flight_abandoned_by_all_callers_is_aborted():
+    llm = BlockingLLM()
+    leader_deadline, follower_deadline = Deadline(30), Deadline(30)
+    leader, follower = start_leader_and_follower(llm, leader_deadline, follower_deadline)
+
+    leader_deadline.cancel()
+    follower_deadline.cancel()
+    for caller in (leader, follower):
+        caller.join(timeout=1)
+        assert isinstance(caller.error, RequestCancelled)
+
+    time.sleep(0.1)  # the upstream call notices the cancelled group deadline
+    assert not leader.orchestrator._flights
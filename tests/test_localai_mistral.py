@@ -0,0 +1,95 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from application.services.deadline import Deadline, DeadlineExceeded, DeadlineGroup, RequestCancelled
+from core.models.llm import ChatMessage, LLMRequest
+from infrastructure.llm.localai_mistral import LocalAIMistral
+
+STALL_SECONDS = 10
+
+
+# HTTP/1.0 responses close the connection, so http.client detaches the socket from it.
+@pytest.fixture(params=["HTTP/1.0", "HTTP/1.1"])
+def stalling_server(request):
+    """An SSE endpoint that sends its headers, then stalls like a model in prefill."""
+    release = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = request.param
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.flush()
+            release.wait(STALL_SECONDS)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def make_request() -> LLMRequest:
+    return LLMRequest(messages=[ChatMessage(role="user", content="How do I request VPN access?")], max_tokens=16)
+
+
+def call_in_background(url: str, deadline: Deadline) -> dict:
+    outcome = {}
+
+    def run():
+        started = time.monotonic()
+        try:
+            LocalAIMistral(base_url=url).chat_completion(make_request(), deadline)
+        except Exception as e:
+            outcome["error"] = e
+        outcome["elapsed"] = time.monotonic() - started
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    outcome["thread"] = thread
+    return outcome
+
+
+def test_cancel_aborts_a_call_stalled_in_prefill(stalling_server):
+    deadline = Deadline(4)
+    outcome = call_in_background(stalling_server, deadline)
+
+    time.sleep(0.3)
+    deadline.cancel()
+    outcome["thread"].join(timeout=2)
+
+    assert isinstance(outcome.get("error"), RequestCancelled)
+    assert outcome["elapsed"] < 1.5
+
+
+def test_deadline_expiring_mid_stream_is_a_deadline_error(stalling_server):
+    outcome = call_in_background(stalling_server, Deadline(0.5))
+    outcome["thread"].join(timeout=3)
+
+    assert isinstance(outcome.get("error"), DeadlineExceeded)
+
+
+def test_coalesced_call_is_aborted_once_every_caller_cancelled(stalling_server):
+    first, second = Deadline(4), Deadline(4)
+    outcome = call_in_background(stalling_server, DeadlineGroup([first, second]))
+
+    time.sleep(0.3)
+    first.cancel()
+    time.sleep(0.3)
+    assert outcome["thread"].is_alive()
+
+    second.cancel()
+    outcome["thread"].join(timeout=2)
+    assert isinstance(outcome.get("error"), RequestCancelled)
@@ -0,0 +1,78 @@
+import pytest
+
+from infrastructure.db.near_duplicates import NearDuplicateDetector
+
+FOOTER = (
+    "This page is maintained by the Knowledge Management team. If you find outdated or incorrect information, "
+    "please leave a comment below or contact the page owner directly. Changes to this page are reviewed every week, "
+    "and the change history is available from the page menu. Do not copy the content of this page to external systems."
+)
+
+NEAR_DUPLICATES = [
+    (
+        "This document is intended for internal use only. Do not share it outside the company "
+        "without approval from the Legal department.",
+        "This document is intended for internal use only.  Do not share it outside the company "
+        "without approval from the Legal Department!",
+    ),
+    (
+        "CONFIDENTIAL: The information on this page is the property of Example Corp and may contain sensitive data. "
+        "Unauthorized copying, distribution or disclosure is strictly prohibited.",
+        "CONFIDENTIAL - The information on this page is the property of Example Corp and may contain sensitive data. "
+        "Unauthorized copying, distribution, or disclosure is strictly prohibited.",
+    ),
+    (FOOTER, FOOTER.replace("contact the page owner directly", "contact the page owner")),
+]
+
+# Same template, different facts: collapsing them would answer from the wrong article.
+DISTINCT = [
+    (
+        "Administrators must rotate the root password every 30 days and store the new password in the team vault.",
+        "Administrators must rotate the root password every 90 days and store the new password in the team vault.",
+    ),
+    (
+        "Connect to the VPN gateway vpn1.example.com on port 443 using the company certificate and your SSO credentials.",
+        "Connect to the VPN gateway vpn2.example.com on port 1194 using the company certificate and your SSO credentials.",
+    ),
+    (
+        "To request access to Jira, open a ticket in the IT portal and select the Jira category. "
+        "Your manager approves the request.",
+        "To request access to Confluence, open a ticket in the IT portal and select the Confluence category. "
+        "Your manager approves the request.",
+    ),
+    (
+        "For questions about this procedure, contact the IT Service Desk by email or open a ticket "
+        "in the self-service portal.",
+        "For questions about this procedure, contact the HR Service Desk by email or open a ticket "
+        "in the self-service portal.",
+    ),
+    (
+        "Expense reports must be submitted within 30 days of the purchase, together with the original receipts.",
+        "Vacation requests must be submitted at least two weeks in advance and approved by your team lead.",
+    ),
+]
+
+
+@pytest.mark.parametrize("canonical, edited", NEAR_DUPLICATES)
+def test_edited_boilerplate_is_collapsed(canonical, edited):
+    detector = NearDuplicateDetector()
+    detector.add("a#1", canonical, "employee")
+
+    assert detector.find_duplicate(edited, "employee") == "a#1"
+
+
+@pytest.mark.parametrize("first, second", DISTINCT)
+def test_paragraphs_stating_different_facts_are_kept(first, second):
+    detector = NearDuplicateDetector()
+    detector.add("a#1", first, "employee")
+
+    assert detector.find_duplicate(second, "employee") is None
+
+
+def test_duplicates_are_scoped_by_role():
+    canonical, edited = NEAR_DUPLICATES[0]
+    detector = NearDuplicateDetector()
+    detector.add("a#1", canonical, "admin")
+
+    assert detector.find_duplicate(edited, "employee") is None
+    assert detector.stats()["chunks_collapsed"] == 0
@@ -0,0 +1,33 @@
+from application.services.session_store import SessionStore
+from core.models.session import ConversationTurn
+
+
+def make_turn(question: str) -> ConversationTurn:
+    return ConversationTurn(question=question, answer=f"Answer to {question}", sources=[], is_complete=True)
+
+
+def test_concurrent_turns_of_one_session_are_both_kept():
+    store = SessionStore()
+    session_id = store.create().session_id
+
+    first = store.get(session_id)
+    second = store.get(session_id)
+    first.turns.append(make_turn("How do I request VPN access?"))
+    second.turns.append(make_turn("Who approves it?"))
+    store.save(first)
+    store.save(second)
+
+    questions = [turn.question for turn in store.get(session_id).turns]
+    assert questions == ["How do I request VPN access?", "Who approves it?"]
+
+
+def test_sequential_turns_are_not_duplicated():
+    store = SessionStore()
+    session_id = store.create().session_id
+
+    for question in ["First question", "Second question"]:
+        session = store.get(session_id)
+        session.turns.append(make_turn(question))
+        store.save(session)
+
+    assert [turn.question for turn in store.get(session_id).turns] == ["First question", "Second question"]
@@ -0,0 +1,55 @@
+import pytest
+
+from infrastructure.db.snapshots import SnapshotManager
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    return SnapshotManager(root=tmp_path)
+
+
+def publish_versions(snapshots: SnapshotManager, count: int) -> list:
+    versions = []
+    for i in range(count):
+        staging = snapshots.root / f".staging-2024010{i}T000000Z-00000{i}"
+        staging.mkdir()
+        version = snapshots.commit(staging, {})
+        snapshots.publish(version)
+        versions.append(version)
+    return versions
+
+
+def test_keep_zero_deletes_old_versions_but_not_current_or_previous(snapshots):
+    versions = publish_versions(snapshots, 4)
+
+    deleted = snapshots.garbage_collect(keep=0)
+
+    assert deleted == versions[:2]
+    assert snapshots.list_versions() == versions[2:]
+
+
+def test_keep_one_still_protects_the_previously_published_version(snapshots):
+    versions = publish_versions(snapshots, 3)
+
+    snapshots.garbage_collect(keep=1)
+
+    assert snapshots.list_versions() == versions[1:]
+
+
+def test_previous_version_is_relative_to_current_after_rollback(snapshots):
+    versions = publish_versions(snapshots, 4)
+    snapshots.rollback()  # serve versions[2]; versions[3] is newer than current and kept
+
+    snapshots.garbage_collect(keep=1)
+
+    assert snapshots.list_versions() == versions[1:]
+
+
+def test_previous_version_does_not_change_what_is_published(snapshots):
+    versions = publish_versions(snapshots, 3)
+    history = (snapshots.root / "history.json").read_text(encoding="utf-8")
+
+    assert snapshots.previous_version() == versions[1]
+    assert snapshots.current_version() == versions[2]
+    assert (snapshots.root / "history.json").read_text(encoding="utf-8") == history
+    assert snapshots.rollback() == versions[1]